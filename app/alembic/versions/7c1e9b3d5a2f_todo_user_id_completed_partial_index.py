@@ -0,0 +1,41 @@
+"""todo user_id completed partial index
+
+Revision ID: 7c1e9b3d5a2f
+Revises: f0fdf083d743
+Create Date: 2026-10-18 16:12:40.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e9b3d5a2f'
+down_revision = 'f0fdf083d743'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 已完成/未完成列表按 (user_id, completed) 过滤，只索引未删除的记录
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_todo_user_id_completed',
+            'todo',
+            ['user_id', 'completed'],
+            unique=False,
+            postgresql_where=sa.text('is_deleted = false'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_todo_user_id_completed',
+            table_name='todo',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,87 @@
+"""archive tables
+
+Revision ID: 9a4d2f6c8e1b
+Revises: 7c1e9b3d5a2f
+Create Date: 2026-10-18 17:40:03.926514
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4d2f6c8e1b'
+down_revision = '7c1e9b3d5a2f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 归档表只有列和主键，不带外键和唯一约束
+    op.create_table('todo_archive',
+    sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('description', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('text', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('completed', sa.Boolean(), nullable=False),
+    sa.Column('user_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_todo_archive_user_id', 'todo_archive', ['user_id'], unique=False)
+    op.create_table('user_archive',
+    sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('description', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('username', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('phone_number', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('hashed_password', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('is_superuser', sa.Boolean(), nullable=False),
+    sa.Column('shortid', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # 热表上的索引在线创建：CREATE INDEX CONCURRENTLY 不能在事务中执行，且不锁写入
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_todo_updated_at_deleted',
+            'todo',
+            ['updated_at'],
+            unique=False,
+            postgresql_where=sa.text('is_deleted = true'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_user_updated_at_deleted',
+            'user',
+            ['updated_at'],
+            unique=False,
+            postgresql_where=sa.text('is_deleted = true'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table in (
+            ('ix_user_updated_at_deleted', 'user'),
+            ('ix_todo_updated_at_deleted', 'todo'),
+        ):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    op.drop_table('user_archive')
+    op.drop_index('ix_todo_archive_user_id', table_name='todo_archive')
+    op.drop_table('todo_archive')
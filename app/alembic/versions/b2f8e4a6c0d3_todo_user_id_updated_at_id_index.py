@@ -0,0 +1,41 @@
+"""todo user_id updated_at id index
+
+Revision ID: b2f8e4a6c0d3
+Revises: 9a4d2f6c8e1b
+Create Date: 2026-10-18 19:02:57.481130
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2f8e4a6c0d3'
+down_revision = '9a4d2f6c8e1b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 增量同步按 (user_id, updated_at, id) 读取，包含已删除记录；
+    # 以 user_id 开头，归档用户时的外键检查也走这个索引，不再单独建 user_id 索引
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_todo_user_id_updated_at_id',
+            'todo',
+            ['user_id', 'updated_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_todo_user_id_updated_at_id',
+            table_name='todo',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,40 @@
+"""smscoderecord phone_number created_at index
+
+Revision ID: b7d2c4e8f1a3
+Revises: 6f299294d684
+Create Date: 2026-10-18 10:12:40.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2c4e8f1a3'
+down_revision = '6f299294d684'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY 不能在事务中执行，且不锁写入
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_smscoderecord_phone_number_created_at',
+            'smscoderecord',
+            ['phone_number', sa.text('created_at DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_smscoderecord_phone_number_created_at',
+            table_name='smscoderecord',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,41 @@
+"""todo user_id created_at id partial index
+
+Revision ID: c3e9a1f5d7b2
+Revises: b7d2c4e8f1a3
+Create Date: 2026-10-18 11:05:21.774913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e9a1f5d7b2'
+down_revision = 'b7d2c4e8f1a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY 不能在事务中执行，且不锁写入
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_todo_user_id_created_at_id',
+            'todo',
+            ['user_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_where=sa.text('is_deleted = false'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_todo_user_id_created_at_id',
+            table_name='todo',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
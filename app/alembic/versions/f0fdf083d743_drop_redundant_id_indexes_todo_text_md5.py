@@ -0,0 +1,100 @@
+"""drop redundant id indexes todo text md5
+
+Revision ID: f0fdf083d743
+Revises: d5f1b3a7c9e4
+Create Date: 2026-10-18 07:19:13.008094
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'f0fdf083d743'
+down_revision = 'd5f1b3a7c9e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ix_smscoderecord_id: redundant, 被 smscoderecord_pkey(id) 覆盖
+    # ix_user_id: redundant, 被 user_pkey(id) 覆盖
+    # ix_todo_text: oversized, 无长度限制的文本列 text 上的唯一B树索引,可改为 md5(text)
+    # ix_todo_id: redundant, 被 todo_pkey(id) 覆盖
+    # CREATE/DROP INDEX CONCURRENTLY 不能在事务中执行，且不锁写入
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ux_todo_text_md5',
+            'todo',
+            [sa.text('md5(text)')],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ix_smscoderecord_id',
+            table_name='smscoderecord',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_user_id',
+            table_name='user',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_todo_text',
+            table_name='todo',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_todo_id',
+            table_name='todo',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_smscoderecord_id',
+            'smscoderecord',
+            ['id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_user_id',
+            'user',
+            ['id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_todo_text',
+            'todo',
+            ['text'],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_todo_id',
+            'todo',
+            ['id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'ux_todo_text_md5',
+            table_name='todo',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -4,22 +4,32 @@
 包括数据库会话管理、用户认证、权限检查等功能。
 
 主要组件:
-    - 数据库会话管理: get_temp_db(), get_db()
+    - 数据库会话管理: get_temp_db(), get_db(), get_async_db()
     - 用户认证: get_current_user(), get_current_active_superuser() 
     - IP地址获取: get_client_ip()
+    - 限流: limit_sms_code_request()
 """
 
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from contextlib import contextmanager
 from typing import Annotated
-from fastapi import Depends, HTTPException, Request
+from fastapi import Body, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import ValidationError
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core import security
+from app.core.auth_cache import (
+    AuthUser,
+    token_cache,
+    token_cache_key,
+    token_cache_ttl,
+    user_auth_cache,
+)
 from app.core.config import settings
-from app.core.db import engine
+from app.core.db import async_engine, engine
+from app.core.ratelimit import RateLimiter
 from app.models.base_models.Token import TokenPayload
 from app.models.table import User
 
@@ -68,53 +78,87 @@ def get_db() -> Generator[Session, None, None]:
 SessionDep = Annotated[Session, Depends(get_db)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """创建异步数据库会话的依赖注入函数。
+
+    为每个请求创建一个新的异步数据库会话,供 `async def` 路由使用。
+    关闭 expire_on_commit,避免提交后访问属性时触发隐式的同步加载。
+
+    Yields:
+        AsyncSession: SQLModel异步数据库会话对象
+    """
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
+
+
+async def get_current_user(session: AsyncSessionDep, token: TokenDep) -> AuthUser:
     """获取当前已认证用户。
 
-    验证JWT令牌并返回对应的用户对象。
+    验证JWT令牌并返回对应用户的认证信息。
+    已验证过的令牌和用户信息优先从进程内缓存读取,未命中时才解码令牌和查询数据库。
 
     Args:
-        session: 数据库会话
+        session: 异步数据库会话
         token: JWT认证令牌
 
     Returns:
-        User: 当前认证用户对象
+        AuthUser: 当前认证用户的认证信息
 
     Raises:
         HTTPException: 当令牌无效或用户不存在时抛出400错误
                       当用户被禁用时抛出401错误
     """
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+    # 已验证过的令牌直接取出用户ID，跳过解码和校验
+    token_key = token_cache_key(token)
+    userid = token_cache.get(token_key)
+    if userid is None:
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+            )
+            token_data = TokenPayload(**payload)
+        except (JWTError, ValidationError, ValueError):
+            raise HTTPException(
+                status_code=400, detail="请重新登录。")
+        userid = token_data.sub
+        if userid is not None:
+            token_cache.set(token_key, userid, ttl=token_cache_ttl(payload))
+    # 先查缓存，未命中再从会话中获取用户
+    auth_user = user_auth_cache.get(userid)
+    if auth_user is None:
+        user = await session.get(User, userid)
+        if not user:
+            raise HTTPException(status_code=400, detail="用户不存在。")
+        auth_user = AuthUser(
+            id=user.id,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            is_deleted=user.is_deleted,
         )
-        token_data = TokenPayload(**payload)
-    except (JWTError, ValidationError, ValueError):
-        raise HTTPException(
-            status_code=400, detail="请重新登录。")
-    # 从会话中获取用户
-    userid = token_data.sub
-    user = session.get(User, userid)
-    if not user:
+        user_auth_cache.set(userid, auth_user)
+    if auth_user.is_deleted:
         raise HTTPException(status_code=400, detail="用户不存在。")
-    if not user.is_active:
+    if not auth_user.is_active:
         raise HTTPException(status_code=401, detail="你已被封禁。")
 
-    return user
+    return auth_user
 
 
 # 当前用户依赖
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[AuthUser, Depends(get_current_user)]
 
 
-def get_current_active_superuser(current_user: CurrentUser) -> User:
+def get_current_active_superuser(current_user: CurrentUser) -> AuthUser:
     """验证当前用户是否为超级管理员。
 
     Args:
-        current_user: 当前认证用户对象
+        current_user: 当前认证用户信息
 
     Returns:
-        User: 当前超级管理员用户对象
+        AuthUser: 当前超级管理员的认证信息
 
     Raises:
         HTTPException: 当用户不是超级管理员时抛出400错误
@@ -127,7 +171,7 @@ def get_current_active_superuser(current_user: CurrentUser) -> User:
 
 
 # 当前超级管理员依赖
-CurrentSuperUser = Annotated[User, Depends(get_current_active_superuser)]
+CurrentSuperUser = Annotated[AuthUser, Depends(get_current_active_superuser)]
 
 
 def get_client_ip(request: Request):
@@ -145,3 +189,37 @@ def get_client_ip(request: Request):
     if x_forwarded_for:
         return x_forwarded_for.split(',')[-1].strip()
     return request.client.host
+
+
+# 验证码限流器：同一手机号和同一IP分别计数
+sms_phone_limiter = RateLimiter(
+    "sms_phone",
+    capacity=settings.SMS_PHONE_RATE_CAPACITY,
+    period=settings.SMS_PHONE_RATE_PERIOD_SECONDS,
+)
+sms_ip_limiter = RateLimiter(
+    "sms_ip",
+    capacity=settings.SMS_IP_RATE_CAPACITY,
+    period=settings.SMS_IP_RATE_PERIOD_SECONDS,
+)
+
+
+async def limit_sms_code_request(
+    phone_number: str = Body(embed=True),
+    client_ip: str = Depends(get_client_ip),
+) -> None:
+    """验证码请求限流。
+
+    作为路由级依赖挂载,在访问数据库之前执行。先按手机号计数,再按IP计数,
+    同一IP轮换手机号也会被限制；同一手机号被限流的重复请求不会消耗IP的令牌,
+    不会连带限制同一出口IP(如NAT)后的其他用户。
+
+    Args:
+        phone_number: 目标手机号,与路由共用请求体中的同名字段
+        client_ip: 客户端IP地址
+
+    Raises:
+        HTTPException: 超出限制时抛出429错误,Retry-After为需要等待的秒数
+    """
+    await sms_phone_limiter.hit(phone_number)
+    await sms_ip_limiter.hit(client_ip)
@@ -0,0 +1,88 @@
+"""
+基于orjson的响应类和统一响应封装
+
+orjson原生支持UUID、datetime和dataclass,SQLModel对象在default钩子里
+直接按字段取值转为dict,不经过model_dump和jsonable_encoder的二次校验.
+
+路由直接返回Response时FastAPI不会再走jsonable_encoder,
+因此热点接口应返回envelope()或json_response(),而不是RespMod或模型列表.
+"""
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def orjson_default(obj: Any) -> Any:
+    """
+    orjson无法原生序列化的对象的转换钩子
+
+    Args:
+        obj: 待序列化对象
+
+    Returns:
+        Any: orjson可以序列化的对象
+
+    Raises:
+        TypeError: 不支持的类型
+    """
+    if isinstance(obj, BaseModel):
+        return {name: getattr(obj, name) for name in type(obj).model_fields}
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """使用应用统一的orjson选项序列化"""
+    return orjson.dumps(
+        content,
+        default=orjson_default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+
+class AppJSONResponse(ORJSONResponse):
+    """应用默认响应类,在ORJSONResponse基础上支持SQLModel对象"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(content: Any, status_code: int = 200) -> AppJSONResponse:
+    """
+    直接序列化任意内容为响应,跳过FastAPI的jsonable_encoder
+
+    Args:
+        content: 响应内容,可包含SQLModel对象、UUID和datetime
+        status_code: HTTP状态码
+
+    Returns:
+        AppJSONResponse: JSON响应
+    """
+    return AppJSONResponse(content=content, status_code=status_code)
+
+
+def envelope(data: Any = None, message: str = "", code: int = 200,
+             status_code: int = 200) -> AppJSONResponse:
+    """
+    按RespMod的结构返回响应,不构造RespMod模型
+
+    Args:
+        data: 响应数据,None时返回空dict,与RespMod默认值一致
+        message: 提示信息
+        code: 业务状态码
+        status_code: HTTP状态码
+
+    Returns:
+        AppJSONResponse: {"message", "code", "data"}结构的JSON响应
+    """
+    return json_response(
+        {"message": message, "code": code, "data": {} if data is None else data},
+        status_code=status_code,
+    )
@@ -1,10 +1,137 @@
 
-from fastapi import APIRouter
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.api.depends import AsyncSessionDep, CurrentUser
+from app.crud.GuaReadingCRUD import AsyncGuaReadingCRUD
+from app.gua.casting import CastMethod, cast
+from app.gua.interpretations import json_array, reading_bytes, record_bytes, resp_bytes
+from app.gua.tables import HEXAGRAMS
+from app.api.responses import envelope
+from app.core.query_budget import QueryBudget
+from app.models.table import GuaReading
+from app.tool.cursor import CursorTool
 
 
 router = APIRouter()
 
+# 批量起卦单次最多次数
+GUA_BATCH_MAX_COUNT = 1000
+# 登录用户单次起卦并保存的最多次数
+GUA_SAVE_MAX_COUNT = 100
+
+
+def reading_record(reading: GuaReading) -> bytes:
+    """把起卦记录还原为序列化好的完整解卦结果"""
+    return record_bytes(
+        reading.id, reading.created_at, reading.hexagram_code, reading.changing_mask)
+
 
 @router.get("/",summary="起卦接口")
-async def gua():
-    return"起卦接口"
+async def gua(
+    method: CastMethod = "coin",
+    seed: int | None = Query(default=None, ge=0),
+):
+    """起一卦.
+
+    Args:
+        method: 起卦方法,coin为金钱卦,yarrow为蓍草卦
+        seed: 随机种子,传入时结果可复现
+
+    Returns:
+        RespMod: data为卦象结果,包含爻值、变爻、本卦、变卦、互卦和卦辞爻辞
+    """
+    result = cast(1, method, seed)
+    return resp_bytes(
+        reading_bytes(int(result.codes[0]), int(result.masks[0])), message="起卦成功。")
+
+
+@router.get("/batch",summary="批量起卦接口")
+async def gua_batch(
+    count: int = Query(default=10, ge=1, le=GUA_BATCH_MAX_COUNT),
+    method: CastMethod = "coin",
+    seed: int | None = Query(default=None, ge=0),
+):
+    """一次起多卦,所有爻值在一次向量化计算中生成.
+
+    Args:
+        count: 起卦次数
+        method: 起卦方法,coin为金钱卦,yarrow为蓍草卦
+        seed: 随机种子,传入时结果可复现
+
+    Returns:
+        RespMod: data为卦象结果列表
+    """
+    result = cast(count, method, seed)
+    data = json_array(
+        reading_bytes(code, mask)
+        for code, mask in zip(result.codes.tolist(), result.masks.tolist()))
+    return resp_bytes(data, message="起卦成功。")
+
+
+@router.post("/cast",summary="起卦并保存记录")
+async def gua_cast_and_save(
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    count: int = Query(default=1, ge=1, le=GUA_SAVE_MAX_COUNT),
+    method: CastMethod = "coin",
+    seed: int | None = Query(default=None, ge=0),
+):
+    """为当前用户起卦并保存到起卦历史.
+
+    只保存本卦编码和变爻掩码,返回时取缓存的解卦结果拼接.
+
+    Returns:
+        RespMod: data为带记录ID和时间的卦象结果列表
+    """
+    result = cast(count, method, seed)
+    readings = await AsyncGuaReadingCRUD(session).create_readings(
+        current_user.id, result.codes.tolist(), result.masks.tolist())
+    return resp_bytes(json_array(reading_record(r) for r in readings), message="起卦成功。")
+
+
+@router.get("/history",summary="起卦历史", dependencies=[Depends(QueryBudget(2))])
+async def gua_history(
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+):
+    """按时间倒序分页获取当前用户的起卦历史.
+
+    Args:
+        limit: 每页条数
+        cursor: 上一页返回的next_cursor,第一页不传
+
+    Returns:
+        RespMod: data包含items和next_cursor
+    """
+    after = None
+    if cursor:
+        try:
+            after = CursorTool.decode(cursor, id_type=int)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="无效的分页游标")
+    readings, next_after = await AsyncGuaReadingCRUD(session).get_history(
+        current_user.id, limit, after)
+    next_cursor = CursorTool.encode(*next_after) if next_after else None
+    data = (b'{"items":' + json_array(reading_record(r) for r in readings)
+            + b',"next_cursor":' + orjson.dumps(next_cursor) + b"}")
+    return resp_bytes(data)
+
+
+@router.get("/stats",summary="起卦统计")
+async def gua_stats(
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+):
+    """统计当前用户六十四卦各自出现的次数,分组计数在数据库中完成.
+
+    Returns:
+        RespMod: data包含total和按文王卦序排列的64卦次数
+    """
+    counts = await AsyncGuaReadingCRUD(session).get_hexagram_counts(current_user.id)
+    hexagrams = sorted(HEXAGRAMS, key=lambda h: h["number"])
+    return envelope(data={
+        "total": sum(counts.values()),
+        "hexagrams": [{**h, "count": counts.get(h["code"], 0)} for h in hexagrams],
+    })
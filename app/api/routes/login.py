@@ -2,23 +2,27 @@
 from datetime import timedelta
 from typing import Annotated
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core import security
 from app.models.base_models.Token import Token
 from fastapi import APIRouter, Body, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from app.api.depends import SessionDep, get_client_ip
+from app.api.depends import AsyncSessionDep, SessionDep, get_client_ip, limit_sms_code_request
+from app.api.responses import envelope
 from app.core.config import settings
 from app.core.security import create_access_token, make_token_for_user_to_login
+from app.core.sms import SMSJob, sms_dispatcher
 from app.models.public_models.Out import ErrorMod, RespMod
 from app.tool.random import RandomGenerator
-from app.crud.SMSCodeRecordCRUD import SMSCodeRecordCRUD
-from app.crud.UserCRUD import UserCRUD
+from app.crud.SMSCodeRecordCRUD import AsyncSMSCodeRecordCRUD, SMSCodeRecordCRUD
+from app.crud.UserCRUD import AsyncUserCRUD, UserCRUD
 router = APIRouter()
 
 
-@router.post("/request_sms_code", summary="发送登录验证码", response_model=RespMod)
+@router.post("/request_sms_code", summary="发送登录验证码", response_model=RespMod,
+             dependencies=[Depends(limit_sms_code_request)])
 async def request_sms_code(
-    session: SessionDep,
+    session: AsyncSessionDep,
     phone_number: str = Body(embed=True),
     client_ip: str = Depends(get_client_ip)
 ):
@@ -33,36 +37,40 @@ async def request_sms_code(
         RespMod: 包含成功消息的响应对象
 
     Note:
-        验证码60秒内只能请求一次,请勿重复请求
+        同一手机号默认60秒内只能请求一次,同一IP每小时最多10次,
+        超出时返回429,Retry-After为需要等待的秒数
     """
     await send_sms_code_to_phone_number(session=session, phone_number=phone_number)
-    return RespMod(message="验证码发送成功。")
+    return envelope(message="验证码发送成功。")
 
 
-async def send_sms_code_to_phone_number(*, session=SessionDep, phone_number: str):
-    """调用阿里云短信服务发送验证码并记录.
+async def send_sms_code_to_phone_number(*, session: AsyncSessionDep, phone_number: str):
+    """记录验证码并放入短信发送队列,由后台dispatcher按批发送.
 
     Args:
-        session: 数据库会话
+        session: 异步数据库会话
         phone_number: 目标手机号
-        client_ip: 客户端IP地址
+
+    Raises:
+        ErrorMod: 短信队列已满
     """
     if settings.ENVIRONMENT != "production":
         sms_code = 1205
     else:
         sms_code = RandomGenerator().generate_sms_code(length=4)
-        # await alibaba.send_sms_code_async(code=verification_code, phone_number=phone_number)
-    SMSCodeRecordCRUD(session).create_sms_code_record(
+    await AsyncSMSCodeRecordCRUD(session).create_sms_code_record(
         phone_number=phone_number, sms_code=sms_code)
+    if not sms_dispatcher.enqueue(SMSJob(phone_number=phone_number, sms_code=sms_code)):
+        raise ErrorMod(message="短信服务繁忙,请稍后再试。")
 
 
 @router.post("/signup_and_login_with_mobile_phone_and_sms_code", summary="验证码注册&自动登录用户", response_model=RespMod)
-def phone_login(request: Request, session: SessionDep, phone_number: str = Body(), sms_code: int = Body()):
+async def phone_login(request: Request, session: AsyncSessionDep, phone_number: str = Body(), sms_code: int = Body()):
     """使用短信验证码进行用户注册和登录.
 
     Args:
         request: HTTP请求对象
-        session: 数据库会话依赖
+        session: 异步数据库会话依赖
         phone_number: 用户手机号
         sms_code: 短信验证码
 
@@ -72,45 +80,46 @@ def phone_login(request: Request, session: SessionDep, phone_number: str = Body(
     Raises:
         ErrorMod: 当验证码不存在、无效或过期时抛出
     """
-    sms_code_record = SMSCodeRecordCRUD(
+    sms_code_record = await AsyncSMSCodeRecordCRUD(
         session).get_latest_sms_code_record(phone_number=phone_number)
     if sms_code_record is None:
         raise ErrorMod(message=f"验证码不存在。")
     elif sms_code_record.sms_code == sms_code:
         if not sms_code_record.is_expired():
-            return handle_valid_sms_code(session, phone_number)
+            return await handle_valid_sms_code(session, phone_number)
         else:
-            SMSCodeRecordCRUD(session=session).delete_sms_code_record(
+            await AsyncSMSCodeRecordCRUD(session=session).delete_sms_code_record(
                 record_id=sms_code_record.id)
             raise ErrorMod(message=f"验证码超时。")
     else:
         raise ErrorMod(message=f"无效的验证码。")
 
 
-def handle_valid_sms_code(session: Session, phone_number):
+async def handle_valid_sms_code(session: AsyncSession, phone_number):
     """处理有效的验证码登录请求.
 
+    新用户仅通过短信登录,按 SMS_USER_SKIP_PASSWORD_HASH 决定是否跳过生成密码哈希.
+
     Args:
-        session: 数据库会话
+        session: 异步数据库会话
         phone_number: 用户手机号
-        channel: 登录渠道
-        sms_code_record: 验证码记录对象
 
     Returns:
         RespMod: 包含登录结果和token的响应对象
     """
-    user = UserCRUD(session).get_user_by_phone(phone_number)
+    user = await AsyncUserCRUD(session).get_user_by_phone(phone_number)
     if user is None:
-        new_user = UserCRUD(session).create_user(
-            phone_number
+        new_user = await AsyncUserCRUD(session).create_user(
+            phone_number,
+            with_password=not settings.SMS_USER_SKIP_PASSWORD_HASH
         )
         token = make_token_for_user_to_login(user_id=new_user.id)
         tokeninfo = Token(access_token=token)
-        return RespMod(message="注册并登录成功。", data=tokeninfo.model_dump())
+        return envelope(message="注册并登录成功。", data=tokeninfo)
     else:
         token = make_token_for_user_to_login(user_id=user.id)
         tokeninfo = Token(access_token=token)
-        return RespMod(message="自动登录成功。", data=tokeninfo.model_dump())
+        return envelope(message="自动登录成功。", data=tokeninfo)
 
 
 @router.post("/access-token", summary="⚠️非前端接口")
@@ -1,13 +1,19 @@
 from ast import stmt
-from fastapi import APIRouter, Body, HTTPException, Depends
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Body, HTTPException, Depends, Query
 from sqlmodel import select
 from typing import List
 from uuid import UUID
 from sqlmodel import Session
 
-from app.api.depends import CurrentUser, SessionDep
+from app.api.depends import AsyncSessionDep, CurrentUser, SessionDep
+from app.api.responses import json_response
+from app.core.config import settings
+from app.core.query_budget import QueryBudget
 from app.models.table import TODO, User
-from app.crud.TodoCRUD import TodoCRUD
+from app.crud.TodoCRUD import AsyncTodoCRUD, TodoCRUD
+from app.models.public_models.In import TodoBatchAddIn, TodoBatchCompleteIn, TodoBatchDeleteIn
+from app.tool.cursor import CursorTool
 
 
 router = APIRouter()
@@ -42,14 +48,85 @@ router = APIRouter()
 
 
 #获取所有TODO
-#session: SessionDep 依赖注入的session
-@router.get("/all",summary="获取所有TODO")
+#session: AsyncSessionDep 依赖注入的session
+@router.get("/all",summary="获取所有TODO", dependencies=[Depends(QueryBudget(2))])
 async def get_all_todos(
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user:CurrentUser
 ):
-    todo_crud = TodoCRUD(session)
-    return todo_crud.get_all_todos(user_id=current_user.id)
+    todo_crud = AsyncTodoCRUD(session)
+    return json_response(await todo_crud.get_all_todos(user_id=current_user.id))
+
+
+#分页获取TODO，按创建时间倒序
+#cursor: 上一页返回的next_cursor，第一页不传
+#completed: 不传返回全部，true/false 筛选完成状态
+#keyword: 按内容模糊筛选
+@router.get("/list",summary="分页获取TODO", dependencies=[Depends(QueryBudget(2))])
+async def list_todos(
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+    completed: bool | None = None,
+    keyword: str | None = Query(default=None, max_length=100),
+):
+    after = None
+    if cursor:
+        try:
+            after = CursorTool.decode(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="无效的分页游标")
+    todo_crud = AsyncTodoCRUD(session)
+    todos, next_after = await todo_crud.list_todos(
+        current_user.id, limit, after, completed, keyword)
+    return json_response({
+        "items": todos,
+        "next_cursor": CursorTool.encode(*next_after) if next_after else None,
+    })
+
+
+#增量同步：返回游标之后新建、修改或软删除的TODO，按 (updated_at, id) 正序
+#since: 上次同步返回的next_cursor，首次同步不传；客户端每次同步后保存next_cursor
+#is_deleted为true的记录是删除标记，客户端据此删除本地副本
+#has_more为true时用next_cursor继续拉取；游标早于归档保留期时返回410，需要重新从 /all 全量同步
+@router.get("/changes",summary="增量同步TODO", dependencies=[Depends(QueryBudget(2))])
+async def get_todo_changes(
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    since: str | None = None,
+    limit: int = Query(default=100, ge=1, le=500),
+):
+    now = datetime.now(timezone.utc)
+    after = None
+    if since:
+        try:
+            after = CursorTool.decode(since)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="无效的同步游标")
+        # 超过保留期的删除记录可能已被归档(后台任务或 app.archive_data 命令)，增量结果不再完整
+        since_at = after[0].replace(tzinfo=after[0].tzinfo or timezone.utc)
+        if since_at < now - timedelta(days=settings.ARCHIVE_RETENTION_DAYS):
+            raise HTTPException(status_code=410, detail="同步游标已过期，请重新全量同步")
+    until = now - timedelta(seconds=settings.TODO_CHANGES_LAG_SECONDS)
+    todo_crud = AsyncTodoCRUD(session)
+    todos, next_after = await todo_crud.get_changes(
+        current_user.id,
+        until=until,
+        limit=limit,
+        after=after,
+    )
+    if next_after is not None:
+        next_cursor = CursorTool.encode(*next_after)
+    else:
+        # updated_at 早于until的变更已全部返回，游标推进到until，
+        # 长期没有变更的客户端游标随同步时间前进，不会因超过保留期被要求全量同步
+        next_cursor = CursorTool.encode(until, UUID(int=0))
+    return json_response({
+        "items": todos,
+        "next_cursor": next_cursor,
+        "has_more": next_after is not None,
+    })
 
 
 #创建一个TODO，从body中获取text，embed=True表示从body中获取text【用body参数而非路径参数（/todo_id）】
@@ -57,41 +134,41 @@ async def get_all_todos(
 ##需要先放置没有默认值的参数，再放置有默认值的参数
 @router.post("/add",summary="创建TODO")
 async def add_todo(
-    session: SessionDep, 
+    session: AsyncSessionDep, 
     current_user: CurrentUser, #这个参数没有默认值，所以需要先放置
     text: str = Body(embed=True) #这个参数有默认值，所以需要后放置  
     
 ):
-    todo_crud = TodoCRUD(session)
-    new_todo = todo_crud.create_todo(text=text, user_id=current_user.id)
+    todo_crud = AsyncTodoCRUD(session)
+    new_todo = await todo_crud.create_todo(text=text, user_id=current_user.id)
     return {"message": "创建成功"}
 
 
 #根据ID获取单个TODO
 @router.get("/",summary="获取单个TODO")
 async def get_todo_by_id(
-    session: SessionDep, 
+    session: AsyncSessionDep, 
     todo_id: str,
     current_user: CurrentUser
 ):
-    todo_crud = TodoCRUD(session)
-    todo = todo_crud.get_todo(todo_id,user_id=current_user.id)
+    todo_crud = AsyncTodoCRUD(session)
+    todo = await todo_crud.get_todo(todo_id,user_id=current_user.id)
     if not todo:
         raise HTTPException(status_code=404, detail="TODO不存在或无权限访问")
-    return todo
+    return json_response(todo)
 
 
 #更新TODO的完成状态
 @router.put("/complete",summary="更新TODO完成状态")
 async def complete_todo(
-    session: SessionDep, 
+    session: AsyncSessionDep, 
     current_user: CurrentUser,
     todo_id: str = Body(embed=True), 
     completed: bool = Body(embed=True)
     
 ):
-    todo_crud = TodoCRUD(session)
-    todo = todo_crud.update_todo_status(todo_id, completed, current_user.id)
+    todo_crud = AsyncTodoCRUD(session)
+    todo = await todo_crud.update_todo_status(todo_id, completed, current_user.id)
     if not todo:
         raise HTTPException(status_code=404, detail="TODO不存在或无权限访问")
     return {"message": "更新成功"}
@@ -100,13 +177,13 @@ async def complete_todo(
 #更新TODO内容
 @router.put("/update",summary="更新TODO内容")
 async def update_todo(
-    session: SessionDep, 
+    session: AsyncSessionDep, 
     current_user: CurrentUser,
     todo_id: str = Body(embed=True), 
     text: str = Body(embed=True),
 ):
-    todo_crud = TodoCRUD(session)
-    todo = todo_crud.update_todo_text(todo_id, text, current_user.id)
+    todo_crud = AsyncTodoCRUD(session)
+    todo = await todo_crud.update_todo_text(todo_id, text, current_user.id)
     if not todo:
         raise HTTPException(status_code=404, detail="TODO不存在或无权限访问")
     return {"message": "更新成功"}
@@ -115,13 +192,13 @@ async def update_todo(
 #删除TODO（软删除）
 @router.delete("/",summary="删除TODO")
 async def delete_todo(
-    session: SessionDep, 
+    session: AsyncSessionDep, 
     current_user: CurrentUser,
     todo_id: str = Body(embed=True),
     
 ):
-    todo_crud = TodoCRUD(session)
-    success = todo_crud.delete_todo(todo_id, current_user.id)
+    todo_crud = AsyncTodoCRUD(session)
+    success = await todo_crud.delete_todo(todo_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="TODO不存在或无权限访问")
     return {"message": "删除成功"}
@@ -130,17 +207,66 @@ async def delete_todo(
 #获取已完成的TODO
 @router.get("/completed",summary="获取已完成TODO")
 async def get_completed_todos(
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUser
 ):
-    todo_crud = TodoCRUD(session)
-    return todo_crud.get_completed_todos(current_user.id)
+    todo_crud = AsyncTodoCRUD(session)
+    return json_response(await todo_crud.get_completed_todos(current_user.id))
         
 #获取未完成TODO
 @router.get("/not_completed",summary="获取未完成TODO")
 async def get_not_completed_todos(
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUser
 ):
-    todo_crud = TodoCRUD(session)
-    return todo_crud.get_not_completed_todos(current_user.id)
+    todo_crud = AsyncTodoCRUD(session)
+    return json_response(await todo_crud.get_not_completed_todos(current_user.id))
+
+
+#批量接口：客户端离线同步时一次提交多条操作，整批在同一事务中执行
+#返回逐条结果，ok为false表示该条内容重复、不存在或无权限
+
+#批量创建TODO
+@router.post("/batch/add",summary="批量创建TODO")
+async def batch_add_todos(
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    body: TodoBatchAddIn
+):
+    todo_crud = AsyncTodoCRUD(session)
+    texts = list(dict.fromkeys(body.texts))
+    created = await todo_crud.bulk_create_todos(texts, current_user.id)
+    results = []
+    for text in body.texts:
+        todo_id = created.pop(text, None)
+        results.append({"text": text, "id": todo_id, "ok": todo_id is not None})
+    return {"message": "批量创建完成", "results": results}
+
+
+#批量更新TODO完成状态
+@router.put("/batch/complete",summary="批量更新TODO完成状态")
+async def batch_complete_todos(
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    body: TodoBatchCompleteIn
+):
+    todo_crud = AsyncTodoCRUD(session)
+    updated = await todo_crud.bulk_update_todo_status(
+        [(item.todo_id, item.completed) for item in body.items], current_user.id)
+    results = [{"todo_id": item.todo_id, "ok": item.todo_id in updated}
+               for item in body.items]
+    return {"message": "批量更新完成", "results": results}
+
+
+#批量删除TODO（软删除）
+@router.delete("/batch",summary="批量删除TODO")
+async def batch_delete_todos(
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    body: TodoBatchDeleteIn
+):
+    todo_crud = AsyncTodoCRUD(session)
+    deleted = await todo_crud.bulk_delete_todos(body.todo_ids, current_user.id)
+    results = [{"todo_id": todo_id, "ok": todo_id in deleted}
+               for todo_id in body.todo_ids]
+    return {"message": "批量删除完成", "results": results}
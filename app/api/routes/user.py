@@ -1,10 +1,20 @@
+import logging
+import os
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
 from sqlmodel import select
 from app.models.public_models.Out import ErrorMod
-from app.api.depends import CurrentUser, SessionDep
-from app.models.public_models.Out import RespMod
+from app.api.depends import CurrentSuperUser, CurrentUser, SessionDep
+from app.core.auth_cache import token_cache, user_auth_cache
+from app.core.config import settings
+from app.core.db import async_engine, engine, pool_status
+from app.core.sms import sms_dispatcher
+from app.api.responses import envelope
 from app.crud.UserCRUD import UserCRUD
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -26,11 +36,68 @@ def health_check() -> dict:
     }
 
 
+@router.get("/ready", summary="就绪检查接口",
+            description="检查数据库连通性并返回当前worker的连接池状态")
+async def readiness_check():
+    """执行就绪检查。
+
+    通过异步引擎执行一次 SELECT 1,并返回当前worker两个引擎的连接池实时状态。
+    不同请求可能落到不同worker上,返回中的pid用于区分。
+
+    Returns:
+        dict: 就绪状态信息,数据库不可用时返回503
+            - status (str): 服务状态
+            - pid (int): 当前worker进程ID
+            - workers (int): 配置的worker数
+            - pools (dict): async和sync引擎的连接池状态
+            - sms (dict): 当前worker短信队列长度、发送数、丢弃数和熔断状态
+    """
+    content = {
+        "status": "ready",
+        "pid": os.getpid(),
+        "workers": settings.WORKERS,
+    }
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception:
+        # 异常信息可能包含主机名、库名等连接细节,只写日志不返回给调用方
+        logger.exception("就绪检查连接数据库失败")
+        content["status"] = "unavailable"
+    content["pools"] = {
+        "async": pool_status(async_engine.pool),
+        "sync": pool_status(engine.pool),
+    }
+    content["sms"] = sms_dispatcher.stats()
+    if content["status"] != "ready":
+        return JSONResponse(status_code=503, content=content)
+    return content
+
+
 @router.get("/profile", summary="获取用户详细信息",
             description="获取当前登录用户的完整个人信息")
 def get_user_profile(user: CurrentUser, session: SessionDep):
     user = UserCRUD(session=session).get_user(user.id)
     if user:
-        return RespMod(data=user.model_dump())
+        return envelope(data=user)
     else:
         raise ErrorMod(message="用户不存在")
+
+
+@router.get("/auth_cache_stats", summary="认证缓存统计",
+            description="查看当前worker的令牌和用户认证缓存命中情况,仅超级管理员可用")
+def get_auth_cache_stats(user: CurrentSuperUser) -> dict:
+    """获取当前worker的认证缓存统计。
+
+    Returns:
+        dict: 以 token 和 user 为键的缓存统计信息,每项包含
+            - hits (int): 命中次数
+            - misses (int): 未命中次数
+            - hit_rate (float): 命中率
+            - size (int): 当前缓存条目数
+            - maxsize (int): 最大缓存条目数
+    """
+    return {
+        "token": token_cache.stats(),
+        "user": user_auth_cache.stats(),
+    }
@@ -0,0 +1,74 @@
+"""软删除记录归档脚本。
+
+把软删除超过保留期的 todo、user 记录搬到 todo_archive、user_archive,以及从归档表恢复。
+应用运行时由 app.core.background 按 ARCHIVE_INTERVAL_SECONDS 定期执行同样的归档,
+本脚本用于首次清理积压、手动补跑和恢复。
+
+用法:
+    python -m app.archive_data archive                      # 按 ARCHIVE_RETENTION_DAYS 归档
+    python -m app.archive_data archive --retention-days 90 --max-batches 10
+    python -m app.archive_data restore-user <user_id>       # 恢复用户及其TODO
+    python -m app.archive_data restore-todo <todo_id> ...   # 恢复为未删除的TODO
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.crud.ArchiveCRUD import ArchiveCRUD
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def archive(retention_days: int, batch_size: int, max_batches: int | None) -> None:
+    """执行一轮归档,先TODO后用户"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    started = time.perf_counter()
+    with Session(engine) as session:
+        crud = ArchiveCRUD(session)
+        todos = crud.archive_todos(cutoff, batch_size, max_batches)
+        users = crud.archive_users(cutoff, batch_size, max_batches)
+    logger.info(f"🗄️ 归档 {cutoff:%Y-%m-%d %H:%M} 之前删除的记录: "
+                f"TODO {todos} 条, 用户 {users} 个, {time.perf_counter() - started:.1f}s")
+
+
+def main() -> None:
+    """主函数入口。"""
+    parser = argparse.ArgumentParser(description="软删除记录归档")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    archive_parser = commands.add_parser("archive", help="归档超过保留期的软删除记录")
+    archive_parser.add_argument("--retention-days", type=int, default=settings.ARCHIVE_RETENTION_DAYS)
+    archive_parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    archive_parser.add_argument("--max-batches", type=int, default=None, help="默认一直执行到没有可归档记录")
+
+    user_parser = commands.add_parser("restore-user", help="恢复归档的用户及其TODO")
+    user_parser.add_argument("user_id", type=UUID)
+
+    todo_parser = commands.add_parser("restore-todo", help="恢复归档的TODO")
+    todo_parser.add_argument("todo_ids", type=UUID, nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "archive":
+        archive(args.retention_days, args.batch_size, args.max_batches)
+        return
+    with Session(engine) as session:
+        if args.command == "restore-user":
+            count = ArchiveCRUD(session).restore_user(args.user_id)
+            if not count:
+                parser.exit(1, f"归档表中没有用户 {args.user_id}\n")
+            logger.info(f"✅ 已恢复用户 {args.user_id}, 共 {count} 条记录")
+        else:
+            count = ArchiveCRUD(session).restore_todos(args.todo_ids)
+            logger.info(f"✅ 已恢复 {count}/{len(args.todo_ids)} 条TODO")
+
+
+if __name__ == "__main__":
+    main()
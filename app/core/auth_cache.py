@@ -0,0 +1,84 @@
+"""认证缓存模块。
+
+get_current_user 是调用最频繁的依赖,每次请求都要解码JWT并按用户ID查一次数据库。
+这里为每个worker维护两份LRU/TTL缓存:
+已验证令牌 → 用户ID,以及用户ID → 认证所需字段。
+
+主要组件:
+    - AuthUser: 认证所需的用户字段
+    - token_cache: 按令牌摘要缓存的用户ID
+    - user_auth_cache: 按用户ID缓存的AuthUser
+    - invalidate_user(): 用户信息变更后使缓存失效
+"""
+
+import hashlib
+import time
+from dataclasses import dataclass
+from uuid import UUID
+from app.core.config import settings
+from app.tool.cache import TTLCache
+
+
+@dataclass(frozen=True, slots=True)
+class AuthUser:
+    """认证所需的用户字段
+
+    作为 CurrentUser 注入路由,需要完整用户信息时请通过 UserCRUD 重新查询。
+    """
+    id: UUID
+    is_active: bool
+    is_superuser: bool
+    is_deleted: bool
+
+
+token_cache: TTLCache[str, str] = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAXSIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS,
+)
+
+user_auth_cache: TTLCache[str, AuthUser] = TTLCache(
+    maxsize=settings.USER_CACHE_MAXSIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_user(user_id: str | UUID) -> None:
+    """使指定用户的认证缓存失效。
+
+    其他worker中的缓存无法通知,最迟在 USER_CACHE_TTL_SECONDS 后过期。
+
+    Args:
+        user_id: 用户ID
+    """
+    user_auth_cache.pop(str(user_id))
+
+
+def token_cache_key(token: str) -> str:
+    """计算令牌的缓存键。
+
+    使用SHA-256摘要作为键,避免在内存中长期保存原始令牌。
+
+    Args:
+        token: JWT令牌
+
+    Returns:
+        str: 令牌摘要
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def token_cache_ttl(payload: dict) -> float:
+    """计算已验证令牌的缓存时间。
+
+    缓存时间不超过令牌剩余有效期,保证过期的令牌不会从缓存中被放行。
+
+    Args:
+        payload: 已验证的JWT负载
+
+    Returns:
+        float: 缓存秒数,令牌没有exp时使用 TOKEN_CACHE_TTL_SECONDS
+    """
+    exp = payload.get("exp")
+    if exp is None:
+        return settings.TOKEN_CACHE_TTL_SECONDS
+    return exp - time.time()
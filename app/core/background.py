@@ -0,0 +1,184 @@
+"""后台任务模块。
+
+在应用生命周期内运行周期性维护任务。
+
+生产环境会启动多个uvicorn worker,每个worker都会执行lifespan,
+因此周期任务通过PostgreSQL advisory lock选出一个leader,只有持有锁的worker执行任务。
+leader退出时连接关闭,锁自动释放,其他worker在下一个周期接手。
+短信dispatcher消费的是进程内队列,每个worker都运行。
+
+主要组件:
+    - AdvisoryLeader: 基于advisory lock的leader选举
+    - run_periodic(): 按固定间隔执行任务
+    - archive_soft_deleted(): 把超过保留期的软删除记录搬到归档表
+    - start_background_tasks(), stop_background_tasks(): 在lifespan中启动和停止所有后台任务
+"""
+
+import asyncio
+import logging
+import zlib
+from datetime import datetime, timedelta, timezone
+from collections.abc import Awaitable, Callable
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.sms import sms_dispatcher
+from app.crud.ArchiveCRUD import AsyncArchiveCRUD
+from app.crud.SMSCodeRecordCRUD import AsyncSMSCodeRecordCRUD
+
+logger = logging.getLogger(__name__)
+
+_tasks: list[asyncio.Task] = []
+_leaders: list["AdvisoryLeader"] = []
+
+
+class AdvisoryLeader:
+    """基于PostgreSQL会话级advisory lock的leader选举
+
+    获取到锁的worker会一直持有一个专用连接,直到release()或进程退出;
+    每次检查时先确认连接仍然可用,连接断开即视为失去锁。
+    非PostgreSQL数据库(本地SQLite等)只有单进程,直接视为leader。
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.key = zlib.crc32(name.encode())
+        self._conn: AsyncConnection | None = None
+
+    async def is_leader(self) -> bool:
+        """
+        检查当前worker是否为leader,尚未持有锁时尝试获取
+
+        Returns:
+            bool: 当前worker是否持有锁
+        """
+        if self._conn is not None:
+            # 会话级锁随连接存在;连接被服务端断开(重启、故障转移、空闲超时)时锁已释放,
+            # 其他worker可能已经接任,放弃leader身份后重新竞争
+            try:
+                await self._conn.execute(text("SELECT 1"))
+                await self._conn.commit()
+                return True
+            except Exception as e:
+                logger.warning(f"后台任务leader连接失效,放弃leader: {self.name}: {e}")
+                await self._discard()
+        if async_engine.dialect.name != "postgresql":
+            return True
+        conn = await async_engine.connect()
+        try:
+            acquired = (await conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}
+            )).scalar()
+            # 提交掉查询开启的事务，避免连接长时间处于 idle in transaction
+            await conn.commit()
+        except Exception:
+            await conn.close()
+            raise
+        if not acquired:
+            await conn.close()
+            return False
+        logger.info(f"👑 当前worker成为后台任务leader: {self.name}")
+        self._conn = conn
+        return True
+
+    async def _discard(self) -> None:
+        """关闭已失效的专用连接,连接已断开时关闭也可能失败"""
+        conn, self._conn = self._conn, None
+        try:
+            await conn.close()
+        except Exception:
+            pass
+
+    async def release(self) -> None:
+        """释放锁并关闭专用连接"""
+        if self._conn is None:
+            return
+        try:
+            await self._conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+        finally:
+            await self._conn.close()
+            self._conn = None
+
+
+async def run_periodic(
+    name: str,
+    interval: float,
+    job: Callable[[], Awaitable[None]],
+) -> None:
+    """按固定间隔执行任务,只在leader上执行
+
+    单次执行失败只记录日志,不会中断循环。
+
+    Args:
+        name: 任务名称,同时作为advisory lock的键
+        interval: 执行间隔(秒)
+        job: 要执行的异步任务
+    """
+    leader = AdvisoryLeader(name)
+    _leaders.append(leader)
+    while True:
+        try:
+            if await leader.is_leader():
+                await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"后台任务 {name} 执行失败: {e}")
+        await asyncio.sleep(interval)
+
+
+async def sweep_expired_sms_records() -> None:
+    """分批清理过期的短信验证码记录"""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        count = await AsyncSMSCodeRecordCRUD(session).delete_expired_records(
+            batch_size=settings.SMS_SWEEP_BATCH_SIZE)
+    if count:
+        logger.info(f"🧹 清理过期验证码记录: {count} 条")
+
+
+async def archive_soft_deleted() -> None:
+    """把超过保留期的软删除TODO和用户搬到归档表,先TODO后用户"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.ARCHIVE_RETENTION_DAYS)
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        crud = AsyncArchiveCRUD(session)
+        todos = await crud.archive_todos(
+            cutoff, settings.ARCHIVE_BATCH_SIZE, settings.ARCHIVE_MAX_BATCHES)
+        users = await crud.archive_users(
+            cutoff, settings.ARCHIVE_BATCH_SIZE, settings.ARCHIVE_MAX_BATCHES)
+    if todos or users:
+        logger.info(f"🗄️ 归档软删除记录: TODO {todos} 条, 用户 {users} 个")
+
+
+def start_background_tasks() -> None:
+    """启动所有后台任务,在lifespan启动阶段调用"""
+    if settings.SMS_SWEEP_ENABLED:
+        _tasks.append(asyncio.create_task(run_periodic(
+            "sweep_expired_sms_records",
+            settings.SMS_SWEEP_INTERVAL_SECONDS,
+            sweep_expired_sms_records,
+        )))
+    if settings.ARCHIVE_ENABLED:
+        _tasks.append(asyncio.create_task(run_periodic(
+            "archive_soft_deleted",
+            settings.ARCHIVE_INTERVAL_SECONDS,
+            archive_soft_deleted,
+        )))
+    _tasks.extend(
+        asyncio.create_task(sms_dispatcher.run())
+        for _ in range(settings.SMS_DISPATCH_CONCURRENCY)
+    )
+
+
+async def stop_background_tasks() -> None:
+    """取消所有后台任务并释放leader锁,在lifespan关闭阶段调用"""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+    await sms_dispatcher.close()
+    for leader in _leaders:
+        await leader.release()
+    _leaders.clear()
@@ -48,6 +48,67 @@ class Settings(BaseSettings):
     INVITE_CODE_INPUT_REWARD: int = 2999
     INVITE_CODE_SHARE_REWARD: int = 3999
 
+    # 认证缓存配置（每个worker独立缓存，TTL决定封禁在其他worker上生效的最长延迟）
+    USER_CACHE_MAXSIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+    TOKEN_CACHE_MAXSIZE: int = 50000
+    TOKEN_CACHE_TTL_SECONDS: int = 600
+
+    # 密码哈希配置（每个worker的bcrypt进程池大小；短信注册用户是否跳过生成密码哈希）
+    PASSWORD_HASH_WORKERS: int = 2
+    SMS_USER_SKIP_PASSWORD_HASH: bool = True
+
+    # 后台任务配置（过期验证码清理，多worker时只有一个worker执行）
+    SMS_SWEEP_ENABLED: bool = True
+    SMS_SWEEP_INTERVAL_SECONDS: int = 300
+    SMS_SWEEP_BATCH_SIZE: int = 5000
+
+    # 归档配置（软删除超过保留期的TODO和用户搬到 *_archive 表；每轮最多执行 ARCHIVE_MAX_BATCHES 批，
+    # 每批一个事务，积压时分多轮追上）
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_RETENTION_DAYS: int = 30
+    ARCHIVE_INTERVAL_SECONDS: int = 3600
+    ARCHIVE_BATCH_SIZE: int = 1000
+    ARCHIVE_MAX_BATCHES: int = 100
+
+    # TODO增量同步配置（/todo/changes 只返回早于 当前时间-该秒数 的变更，
+    # 容忍各worker时钟偏差和慢事务晚于时间戳提交）
+    TODO_CHANGES_LAG_SECONDS: int = 5
+
+    # 限流配置（令牌桶，容量为突发上限，按 容量/周期 的速率回填；
+    # 配置 RATE_LIMIT_REDIS_URL 后所有worker共享限流状态，否则每个worker各自计数）
+    RATE_LIMIT_REDIS_URL: str | None = None
+    RATE_LIMIT_REDIS_TIMEOUT_SECONDS: float = 0.2
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    SMS_PHONE_RATE_CAPACITY: int = 1
+    SMS_PHONE_RATE_PERIOD_SECONDS: int = 60
+    SMS_IP_RATE_CAPACITY: int = 10
+    SMS_IP_RATE_PERIOD_SECONDS: int = 3600
+
+    # 短信发送配置（请求只写记录并入队，后台按批发送；stub 为本地模拟供应商，可离线压测）
+    SMS_PROVIDER: Literal["stub", "aliyun"] = "stub"
+    ALIYUN_SMS_ACCESS_KEY_ID: str = ""
+    ALIYUN_SMS_ACCESS_KEY_SECRET: str = ""
+    ALIYUN_SMS_SIGN_NAME: str = ""
+    ALIYUN_SMS_TEMPLATE_CODE: str = ""
+    SMS_QUEUE_MAXSIZE: int = 10000
+    SMS_BATCH_SIZE: int = 100
+    SMS_BATCH_WAIT_SECONDS: float = 0.05
+    SMS_DISPATCH_CONCURRENCY: int = 4
+    SMS_MAX_RETRIES: int = 3
+    SMS_RETRY_BACKOFF_SECONDS: float = 1.0
+    SMS_BREAKER_FAILURE_THRESHOLD: int = 5
+    SMS_BREAKER_RESET_SECONDS: float = 30
+    SMS_HTTP_TIMEOUT_SECONDS: float = 5
+    SMS_HTTP_MAX_CONNECTIONS: int = 20
+    SMS_STUB_LATENCY_SECONDS: float = 0.05
+    SMS_STUB_FAILURE_RATE: float = 0.0
+
+    # 查询预算与N+1检测（未设置模式时生产环境关闭，其余环境只记录日志；路由可用 QueryBudget 覆盖默认预算）
+    QUERY_BUDGET_MODE: Literal["off", "log", "raise"] | None = None
+    QUERY_BUDGET_DEFAULT: int = 20
+    QUERY_REPEAT_THRESHOLD: int = 5
+
     # CORS配置
     BACKEND_CORS_ORIGINS: Annotated[
         list[AnyUrl] | str, BeforeValidator(parse_cors)
@@ -64,10 +125,22 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str = ""
 
+    # 连接池配置（WORKERS 由 start.sh 按实际启动的uvicorn worker数传入）
+    WORKERS: int = 1
+    DB_MAX_CONNECTIONS: int = 500
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # 直接指定连接串，覆盖 POSTGRES_* 配置；压测时指向一次性数据库，支持 sqlite:/// 作为本地替身
+    DATABASE_URL: str | None = None
+
     @computed_field
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
-        """构建PostgreSQL连接URI"""
+        """构建数据库连接URI,设置了DATABASE_URL时直接使用"""
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
         return f"postgresql+psycopg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
     # 超级用户配置
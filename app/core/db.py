@@ -1,55 +1,195 @@
-import multiprocessing
+import hashlib
 import logging
+import sqlite3
+import time
+from sqlalchemy import Engine, event, exc
+from sqlalchemy.dialects.sqlite.aiosqlite import AsyncAdapt_aiosqlite_connection
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
 from sqlmodel import Session, create_engine, select
 from app.core.config import settings
 from app.models.table import User
 from app.crud.UserCRUD import UserCRUD
 
 
-def create_database_engine():
-    """创建数据库引擎实例
+class PoolWaitStats:
+    """连接池等待统计
+
+    记录从连接池获取连接的次数、总等待时间、最长等待时间和超时次数。
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.timeouts = 0
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.count,
+            "avg_wait_ms": self.total_seconds / self.count * 1000 if self.count else 0.0,
+            "max_wait_ms": self.max_seconds * 1000,
+            "timeouts": self.timeouts,
+        }
+
+
+class TimedPoolMixin:
+    """为连接池增加获取连接的等待计时"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.timeouts += 1
+            raise
+        finally:
+            self.wait_stats.record(time.perf_counter() - start)
+
 
-    计算最佳连接池配置并创建SQLAlchemy引擎。
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _sqlite_md5(value: str | None) -> str | None:
+    return None if value is None else hashlib.md5(value.encode()).hexdigest()
+
+
+@event.listens_for(Engine, "connect")
+def register_sqlite_functions(dbapi_connection, connection_record) -> None:
+    """SQLite替身没有md5函数,注册一个与PostgreSQL结果一致的实现
+
+    todo表的唯一约束是 md5(text) 表达式索引,建表和写入都依赖该函数。
+    声明为deterministic后SQLite才允许在索引表达式中使用。
+    """
+    if isinstance(dbapi_connection, (sqlite3.Connection, AsyncAdapt_aiosqlite_connection)):
+        dbapi_connection.create_function("md5", 1, _sqlite_md5, deterministic=True)
+
+
+def pool_options(share: float) -> dict:
+    """计算单个引擎的连接池参数
 
     说明:
-    1. CPU核心数计算:
-       - 获取CPU核心数并乘以2,这样可以充分利用CPU超线程
-       - workers数等于CPU核心数,确保每个worker都有对应的CPU资源
+    1. worker数:
+       - 由 start.sh 计算 nproc × WORKERS_PER_CORE 后通过 WORKERS 环境变量传入,
+         与实际启动的uvicorn worker数保持一致
 
-    2. 连接池配置:
-       - 设置最大数据库连接数为500,这是PostgreSQL的推荐值
-       - pool_size = 最大连接数 ÷ (workers × 2)
-         原因:每个worker都需要连接池,除以2是为了预留buffer
-       - max_overflow设为pool_size,在需要时可以翻倍扩容
+    2. 连接数预算:
+       - 每个worker可用连接数 = DB_MAX_CONNECTIONS ÷ WORKERS
+       - 每个worker有同步、异步两个引擎,按share分配预算
+       - pool_size取分到预算的一半常驻,另一半作为max_overflow在高峰时扩容,
+         这样所有worker满载时连接总数也不会超过DB_MAX_CONNECTIONS
 
-    3. 超时设置:
-       - pool_timeout=30秒,防止连接长时间占用
+    3. 连接健康:
+       - pool_pre_ping: 取出连接前先探活,避免数据库重启后拿到断开的连接
+       - pool_recycle: 定期回收连接,避免被防火墙或PgBouncer静默断开
+       - pool_timeout: 获取连接的最长等待时间
+
+    Args:
+        share: 该引擎占每个worker连接预算的比例
 
     Returns:
-        SQLAlchemy engine实例
+        dict: 传给create_engine的连接池参数
     """
-    # 1. 计算CPU和workers
-    cpu_count = multiprocessing.cpu_count() * 2
-    workers = cpu_count
-    max_db_conn = 500  # PostgreSQL推荐的最大连接数
+    per_worker = settings.DB_MAX_CONNECTIONS // max(settings.WORKERS, 1)
+    max_conn = max(int(per_worker * share), 2)
+    pool_size = max_conn // 2
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_conn - pool_size,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
 
-    # 2. 计算连接池参数
-    pool_size = max_db_conn // (workers * 2)  # 每个worker预留足够连接
-    max_overflow = pool_size  # 允许连接池翻倍扩容
 
-    # 3. 创建引擎
+def create_database_engine():
+    """创建数据库引擎实例
+
+    同步引擎只剩 initial_data.py 等脚本和少量同步路由在用,分到每个worker连接预算的1/4。
+
+    Returns:
+        SQLAlchemy engine实例
+    """
     engine = create_engine(
         str(settings.SQLALCHEMY_DATABASE_URI),
-        pool_size=pool_size,
-        max_overflow=max_overflow,
-        pool_timeout=30
+        poolclass=TimedQueuePool,
+        **pool_options(0.25)
     )
 
     return engine
 
 
+def async_database_uri(uri: str) -> str:
+    """获取异步引擎使用的连接串
+
+    psycopg3 同时提供同步和异步实现,postgresql+psycopg 连接串原样使用;
+    SQLite 替身换用 aiosqlite 驱动。
+    """
+    if uri.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + uri[len("sqlite://"):]
+    return uri
+
+
+def create_async_database_engine() -> AsyncEngine:
+    """创建异步数据库引擎实例
+
+    供 `async def` 路由使用，避免同步查询阻塞事件循环,分到每个worker连接预算的3/4。
+
+    Returns:
+        SQLAlchemy AsyncEngine实例
+    """
+    async_engine = create_async_engine(
+        async_database_uri(str(settings.SQLALCHEMY_DATABASE_URI)),
+        poolclass=TimedAsyncAdaptedQueuePool,
+        **pool_options(0.75)
+    )
+
+    return async_engine
+
+
+def pool_status(pool: Pool) -> dict:
+    """获取连接池的实时状态
+
+    Args:
+        pool: 引擎的连接池
+
+    Returns:
+        dict: 连接池容量、已借出、溢出连接数和等待统计
+    """
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+        })
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        status.update(wait_stats.as_dict())
+    return status
+
+
 # 创建全局引擎实例
+# engine: 同步引擎,供 initial_data.py 等脚本和同步路由使用
+# async_engine: 异步引擎,供 async def 路由使用
 engine = create_database_engine()
+async_engine = create_async_database_engine()
 
 
 def init_db(session: Session) -> None:
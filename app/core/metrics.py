@@ -0,0 +1,162 @@
+"""Prometheus指标模块。
+
+- MetricsMiddleware: 纯ASGI中间件,按路由模板记录请求耗时直方图、进行中请求数和状态码计数
+- SQLAlchemy事件钩子: 统计每个请求执行的SQL条数和数据库耗时,通过contextvar归属到当前请求
+- render_metrics(): 生成Prometheus文本格式的指标
+
+多worker部署时,start.sh设置PROMETHEUS_MULTIPROC_DIR,各worker把指标写入该目录,
+/metrics由任一worker汇总目录中所有worker的数据后输出。该变量必须在导入prometheus_client之前设置。
+未设置时(本地单worker)直接使用进程内默认registry。
+"""
+
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# 未匹配到路由的请求统一归为一个标签,避免扫描类请求撑爆标签基数
+UNMATCHED_ROUTE = "unmatched"
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP请求数",
+    ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP请求耗时",
+    ["method", "route"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "进行中的HTTP请求数",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_QUERIES = Counter(
+    "db_queries_total", "执行的SQL语句数",
+    ["route"],
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "单个请求执行的SQL语句数",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds", "单个请求的数据库耗时",
+    ["route"],
+)
+
+
+@dataclass
+class RequestDBStats:
+    """单个请求的数据库统计"""
+    queries: int = 0
+    duration: float = 0.0
+
+
+# 中间件为每个请求设置一个统计对象;同步路由在线程池中运行时会复制上下文,仍指向同一个对象
+current_db_stats: ContextVar[RequestDBStats | None] = ContextVar(
+    "current_db_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_time"].pop()
+    stats = current_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.duration += time.perf_counter() - started
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    给同步引擎注册SQL计数钩子,异步引擎传入其sync_engine
+
+    Args:
+        engine: SQLAlchemy同步引擎
+    """
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_label(scope: Scope) -> str:
+    """取路由模板作为标签,如 /api/v1/todo/,路径参数不展开"""
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE) if route else UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """记录HTTP请求和数据库指标的ASGI中间件"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        stats = RequestDBStats()
+        token = current_db_stats.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            current_db_stats.reset(token)
+            route = route_label(scope)
+            REQUESTS.labels(method, route, str(status_code)).inc()
+            REQUEST_LATENCY.labels(method, route).observe(elapsed)
+            DB_QUERIES.labels(route).inc(stats.queries)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.duration)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    生成Prometheus文本格式指标,多进程模式下汇总所有worker
+
+    Returns:
+        tuple[bytes, str]: 指标内容和Content-Type
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead() -> None:
+    """worker退出时清理其livesum类gauge,在lifespan关闭阶段调用"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,151 @@
+"""查询预算与N+1检测模块。
+
+开发和暂存环境下统计每个请求执行的SQL语句,发现以下问题时记录日志或直接让请求失败:
+- 语句总数超过路由的查询预算
+- 同一条SQL(参数化后的文本相同)在一个请求内重复执行,典型如逐行触发关系懒加载的N+1
+
+模式由 QUERY_BUDGET_MODE 控制:
+    - off: 不统计,生产环境默认
+    - log: 请求结束时汇总记录警告,本地和暂存环境默认
+    - raise: 超出时在执行SQL处抛出QueryBudgetExceeded,请求返回500
+
+用法:
+    @router.get("/list", dependencies=[Depends(QueryBudget(3))])
+"""
+
+import logging
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import route_label
+
+logger = logging.getLogger(__name__)
+
+
+def budget_mode() -> str:
+    """当前生效的检测模式,未配置时生产环境为off,其余环境为log"""
+    if settings.QUERY_BUDGET_MODE is not None:
+        return settings.QUERY_BUDGET_MODE
+    return "off" if settings.ENVIRONMENT == "production" else "log"
+
+
+class QueryBudgetExceeded(Exception):
+    """请求执行的SQL超出预算或出现重复语句"""
+
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
+
+
+class QueryTracker:
+    """单个请求的SQL统计"""
+
+    def __init__(self, budget: int, repeat_threshold: int, raise_on_violation: bool):
+        self.budget = budget
+        self.repeat_threshold = repeat_threshold
+        self.raise_on_violation = raise_on_violation
+        self.statements: Counter[str] = Counter()
+
+    @property
+    def total(self) -> int:
+        return sum(self.statements.values())
+
+    def repeated(self) -> list[tuple[str, int]]:
+        """重复次数达到阈值的语句,按次数倒序"""
+        return [(s, n) for s, n in self.statements.most_common()
+                if n >= self.repeat_threshold]
+
+    def record(self, statement: str) -> None:
+        """
+        记录一条语句,raise模式下超出时立即抛出
+
+        Raises:
+            QueryBudgetExceeded: 语句数超过预算或同一语句重复次数达到阈值
+        """
+        self.statements[statement] += 1
+        if not self.raise_on_violation:
+            return
+        if self.total > self.budget:
+            raise QueryBudgetExceeded(f"SQL语句数 {self.total} 超出预算 {self.budget}")
+        if self.statements[statement] >= self.repeat_threshold:
+            raise QueryBudgetExceeded(
+                f"同一SQL重复执行 {self.statements[statement]} 次,疑似N+1: {statement}")
+
+    def violations(self) -> list[str]:
+        """请求结束时的问题汇总"""
+        problems = []
+        if self.total > self.budget:
+            problems.append(f"SQL语句数 {self.total} 超出预算 {self.budget}")
+        for statement, count in self.repeated():
+            problems.append(f"同一SQL重复执行 {count} 次,疑似N+1: {statement}")
+        return problems
+
+
+current_tracker: ContextVar[QueryTracker | None] = ContextVar(
+    "current_query_tracker", default=None)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    tracker = current_tracker.get()
+    if tracker is not None:
+        tracker.record(statement)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    给同步引擎注册语句统计钩子,异步引擎传入其sync_engine
+
+    Args:
+        engine: SQLAlchemy同步引擎
+    """
+    if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryBudget:
+    """
+    路由级查询预算依赖,覆盖默认的 QUERY_BUDGET_DEFAULT
+
+    预算包含认证依赖执行的语句,检测关闭时不做任何事。
+
+    Args:
+        max_queries: 该路由单个请求允许执行的最多SQL语句数
+    """
+
+    def __init__(self, max_queries: int):
+        self.max_queries = max_queries
+
+    def __call__(self) -> None:
+        tracker = current_tracker.get()
+        if tracker is not None:
+            tracker.budget = self.max_queries
+
+
+class QueryBudgetMiddleware:
+    """为每个请求创建QueryTracker,log模式下在请求结束时记录问题"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tracker = QueryTracker(
+            budget=settings.QUERY_BUDGET_DEFAULT,
+            repeat_threshold=settings.QUERY_REPEAT_THRESHOLD,
+            raise_on_violation=budget_mode() == "raise",
+        )
+        token = current_tracker.set(tracker)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_tracker.reset(token)
+            for problem in tracker.violations():
+                logger.warning(f"🐢 {scope['method']} {route_label(scope)}: {problem}")
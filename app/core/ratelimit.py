@@ -0,0 +1,186 @@
+"""
+令牌桶限流
+
+每个限流键对应一个桶,容量capacity为允许的突发次数,按capacity/period的速率回填.
+桶里不足一个令牌时拒绝请求,并返回需要等待的秒数.
+
+桶状态默认保存在进程内,每个uvicorn worker各自计数;
+配置RATE_LIMIT_REDIS_URL后改用Redis,在Lua脚本中原子地完成回填和扣减,所有worker共享限流状态.
+Redis不可用时退回进程内计数,不会因此拒绝所有请求.
+
+用法:
+    limiter = RateLimiter("sms_phone", capacity=1, period=60)
+    await limiter.hit(phone_number)  # 超限时抛出429
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBucketStore:
+    """进程内令牌桶存储,超过maxsize时淘汰最久未使用的桶"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> float:
+        """
+        从桶中取出cost个令牌
+
+        Args:
+            key: 限流键
+            capacity: 桶容量
+            rate: 每秒回填的令牌数
+            cost: 本次消耗的令牌数
+
+        Returns:
+            float: 0表示放行,否则为需要等待的秒数
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            retry_after = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                retry_after = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+# KEYS[1]: 桶键; ARGV: 容量, 每秒回填数, 消耗数
+# 使用Redis服务器时间,避免各worker时钟不一致;桶回填满后自动过期
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisBucketStore:
+    """Redis令牌桶存储,需要安装redis包"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("配置了RATE_LIMIT_REDIS_URL,但未安装redis包") from e
+        self.prefix = prefix
+        # 连接和读写都设短超时,Redis不可达时尽快退回进程内计数,不拖慢被限流的请求
+        timeout = settings.RATE_LIMIT_REDIS_TIMEOUT_SECONDS
+        self._client = redis.from_url(url, socket_connect_timeout=timeout, socket_timeout=timeout)
+        self._script = self._client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> float:
+        result = await self._script(keys=[self.prefix + key], args=[capacity, rate, cost])
+        return float(result)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+memory_store = MemoryBucketStore(maxsize=settings.RATE_LIMIT_MAX_KEYS)
+_redis_store: RedisBucketStore | None = None
+# 未安装redis包或连接串无效时只告警一次,之后一直使用进程内计数
+_redis_disabled = False
+
+
+def get_shared_store() -> RedisBucketStore | None:
+    """获取Redis存储,未配置或无法创建时返回None,首次调用时才导入redis"""
+    global _redis_store, _redis_disabled
+    if _redis_store is None and settings.RATE_LIMIT_REDIS_URL and not _redis_disabled:
+        try:
+            _redis_store = RedisBucketStore(settings.RATE_LIMIT_REDIS_URL)
+        except Exception as e:
+            _redis_disabled = True
+            logger.warning(f"无法创建Redis限流存储,改用进程内计数: {e}")
+    return _redis_store
+
+
+class RateLimiter:
+    """
+    按键限流的令牌桶
+
+    Args:
+        name: 限流器名称,作为键前缀区分不同限流器
+        capacity: 桶容量,即允许的突发次数
+        period: 回填满一个桶所需的秒数
+    """
+
+    def __init__(self, name: str, capacity: int, period: float):
+        self.name = name
+        self.capacity = capacity
+        self.rate = capacity / period
+
+    async def retry_after(self, key: str, cost: int = 1) -> float:
+        """
+        消耗令牌并返回需要等待的秒数,0表示放行
+
+        Args:
+            key: 限流键,如手机号或客户端IP
+            cost: 本次消耗的令牌数
+        """
+        bucket = f"{self.name}:{key}"
+        store = get_shared_store()
+        if store is not None:
+            try:
+                return await store.take(bucket, self.capacity, self.rate, cost)
+            except Exception as e:
+                logger.warning(f"限流存储不可用,退回进程内计数: {e}")
+        return await memory_store.take(bucket, self.capacity, self.rate, cost)
+
+    async def hit(self, key: str, cost: int = 1) -> None:
+        """
+        消耗令牌,超限时抛出429
+
+        Raises:
+            HTTPException: 429,Retry-After为需要等待的整秒数
+        """
+        retry_after = await self.retry_after(key, cost)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="请求过于频繁,请稍后再试",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+async def close_rate_limit_store() -> None:
+    """关闭Redis连接,应用关闭时调用"""
+    global _redis_store
+    if _redis_store is not None:
+        await _redis_store.close()
+        _redis_store = None
@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any
 from jose import jwt
@@ -8,6 +10,9 @@ from app.models.table import User
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt哈希专用进程池，首次使用时创建，在应用关闭时释放
+_hash_executor: ProcessPoolExecutor | None = None
+
 
 ALGORITHM = "HS256"
 
@@ -54,6 +59,58 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def get_hash_executor() -> ProcessPoolExecutor:
+    """获取bcrypt哈希专用进程池。
+
+    bcrypt是CPU密集型计算,放在线程池里仍会争抢GIL,因此使用独立进程池。
+    进程数由 PASSWORD_HASH_WORKERS 控制,超出的任务在池内排队,不会占满worker。
+
+    Returns:
+        哈希专用进程池
+    """
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS)
+    return _hash_executor
+
+
+def shutdown_hash_executor() -> None:
+    """关闭bcrypt哈希专用进程池,在应用关闭时调用。"""
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
+async def hash_password_async(password: str) -> str:
+    """在进程池中生成密码的哈希值,不阻塞事件循环。
+
+    Args:
+        password: 需要哈希的明文密码
+
+    Returns:
+        密码的哈希字符串
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hash_executor(), get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """在进程池中验证明文密码是否与哈希密码匹配,不阻塞事件循环。
+
+    Args:
+        plain_password: 用户输入的明文密码
+        hashed_password: 数据库中存储的哈希密码
+
+    Returns:
+        密码是否匹配
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_hash_executor(), verify_password, plain_password, hashed_password)
+
+
 def authenticate(*, session: Session, phone_number: str, password: str) -> User | None:
     """验证用户凭据。
 
@@ -69,7 +126,7 @@ def authenticate(*, session: Session, phone_number: str, password: str) -> User
         select(User)
         .where(User.phone_number == phone_number, User.is_deleted == False)
     ).first()
-    if not user:
+    if not user or not user.hashed_password:
         return None
     if not verify_password(password, user.hashed_password):
         return None
@@ -0,0 +1,368 @@
+"""短信发送模块。
+
+验证码请求只写入验证码记录并把发送任务放入进程内队列,立即返回;
+后台dispatcher从队列中按批取出任务,通过短信供应商发送。
+
+队列在每个worker进程内,每个worker各自运行dispatcher,不需要leader选举。
+队列中尚未发出的任务在进程退出时丢失,用户可在限流允许后重新获取验证码。
+
+主要组件:
+    - StubSMSProvider: 本地模拟供应商,按配置的延迟和失败率模拟发送,用于离线压测
+    - AliyunSMSProvider: 阿里云 SendBatchSms 接口,使用连接池复用的httpx客户端
+    - CircuitBreaker: 连续失败达到阈值后熔断,冷却后放行一批试探
+    - SMSDispatcher: 按批发送,失败后指数退避重试
+    - sms_dispatcher: 按配置创建的全局dispatcher
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Protocol
+from urllib.parse import quote
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SMSJob:
+    """一条待发送的验证码短信"""
+    phone_number: str
+    sms_code: int
+    attempts: int = 0
+
+
+class SMSProvider(Protocol):
+    async def send_batch(self, jobs: list[SMSJob]) -> None:
+        """发送一批短信,整批失败时抛出异常"""
+
+    async def close(self) -> None:
+        """释放连接等资源"""
+
+
+class SMSSendError(Exception):
+    """短信供应商返回失败"""
+
+
+class StubSMSProvider:
+    """本地模拟供应商,不发出真实短信"""
+
+    def __init__(self, latency: float = 0.05, failure_rate: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent = 0
+
+    async def send_batch(self, jobs: list[SMSJob]) -> None:
+        await asyncio.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            raise SMSSendError("stub供应商模拟发送失败")
+        self.sent += len(jobs)
+        logger.debug(f"📨 [stub] 发送验证码 {len(jobs)} 条")
+
+    async def close(self) -> None:
+        pass
+
+
+class AliyunSMSProvider:
+    """阿里云短信 SendBatchSms 接口
+
+    使用RPC风格签名(HMAC-SHA1),单批最多100个手机号,
+    同一批共用签名和模板,模板参数按手机号逐条传入。
+    """
+
+    ENDPOINT = "https://dysmsapi.aliyuncs.com/"
+    MAX_BATCH_SIZE = 100
+
+    def __init__(self, access_key_id: str, access_key_secret: str,
+                 sign_name: str, template_code: str,
+                 timeout: float = 5, max_connections: int = 20):
+        self.access_key_id = access_key_id
+        self.access_key_secret = access_key_secret
+        self.sign_name = sign_name
+        self.template_code = template_code
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """连接池复用的HTTP客户端,首次使用时创建"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    @staticmethod
+    def _encode(value: str) -> str:
+        return quote(value, safe="~")
+
+    def sign(self, params: dict[str, str], method: str = "POST") -> str:
+        """
+        计算RPC风格请求签名
+
+        Args:
+            params: 除Signature外的全部请求参数
+            method: HTTP方法
+
+        Returns:
+            str: Base64编码的HMAC-SHA1签名
+        """
+        canonical = "&".join(
+            f"{self._encode(k)}={self._encode(v)}" for k, v in sorted(params.items()))
+        string_to_sign = f"{method}&{self._encode('/')}&{self._encode(canonical)}"
+        digest = hmac.new(
+            f"{self.access_key_secret}&".encode(),
+            string_to_sign.encode(),
+            hashlib.sha1,
+        ).digest()
+        return base64.b64encode(digest).decode()
+
+    def build_params(self, jobs: list[SMSJob]) -> dict[str, str]:
+        """构造一批短信的请求参数,包含签名"""
+        params = {
+            "AccessKeyId": self.access_key_id,
+            "Action": "SendBatchSms",
+            "Format": "JSON",
+            "RegionId": "cn-hangzhou",
+            "SignatureMethod": "HMAC-SHA1",
+            "SignatureNonce": uuid.uuid4().hex,
+            "SignatureVersion": "1.0",
+            "Timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "Version": "2017-05-25",
+            "PhoneNumberJson": json.dumps([job.phone_number for job in jobs]),
+            "SignNameJson": json.dumps([self.sign_name] * len(jobs), ensure_ascii=False),
+            "TemplateCode": self.template_code,
+            "TemplateParamJson": json.dumps([{"code": str(job.sms_code)} for job in jobs]),
+        }
+        params["Signature"] = self.sign(params)
+        return params
+
+    async def send_batch(self, jobs: list[SMSJob]) -> None:
+        response = await self.client.post(self.ENDPOINT, data=self.build_params(jobs))
+        response.raise_for_status()
+        result = response.json()
+        if result.get("Code") != "OK":
+            raise SMSSendError(f"{result.get('Code')}: {result.get('Message')}")
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class CircuitBreaker:
+    """熔断器
+
+    - closed: 正常放行,连续失败达到failure_threshold次后进入open
+    - open: 拒绝发送,reset_timeout秒后进入half-open
+    - half-open: 只放行一批试探,成功则closed,失败则重新open
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def retry_after(self) -> float:
+        """
+        检查是否可以发送
+
+        Returns:
+            float: 0表示可以发送,否则为建议等待的秒数
+        """
+        state = self.state
+        if state == "closed":
+            return 0
+        if state == "open":
+            return self.reset_timeout - (time.monotonic() - self.opened_at)
+        if self._trial_in_flight:
+            return min(1.0, self.reset_timeout)
+        self._trial_in_flight = True
+        return 0
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(f"⚡ 短信发送连续失败 {self.failures} 次,熔断 {self.reset_timeout} 秒")
+            self.opened_at = time.monotonic()
+
+
+class SMSDispatcher:
+    """验证码短信的批量发送器
+
+    Args:
+        provider: 短信供应商
+        batch_size: 单批最多条数
+        batch_wait: 凑批的最长等待秒数
+        max_retries: 单条短信最多重试次数
+        backoff: 首次重试的退避秒数,之后每次翻倍并加随机抖动
+        breaker: 熔断器
+        queue_maxsize: 队列最大长度
+    """
+
+    def __init__(self, provider: SMSProvider, *, batch_size: int, batch_wait: float,
+                 max_retries: int, backoff: float, breaker: CircuitBreaker,
+                 queue_maxsize: int):
+        self.provider = provider
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker
+        self.queue: asyncio.Queue[SMSJob] = asyncio.Queue(maxsize=queue_maxsize)
+        self.sent = 0
+        self.dropped = 0
+
+    def enqueue(self, job: SMSJob) -> bool:
+        """
+        把发送任务放入队列,不等待
+
+        Returns:
+            bool: 队列已满时返回False
+        """
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            logger.warning(f"短信队列已满,丢弃发送任务: {job.phone_number}")
+            self.dropped += 1
+            return False
+        return True
+
+    async def _next_batch(self) -> list[SMSJob]:
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _schedule_retry(self, jobs: list[SMSJob]) -> None:
+        retry = []
+        for job in jobs:
+            job.attempts += 1
+            if job.attempts > self.max_retries:
+                logger.error(f"短信发送重试 {self.max_retries} 次仍失败,放弃: {job.phone_number}")
+                self.dropped += 1
+            else:
+                retry.append(job)
+        if not retry:
+            return
+        attempts = max(job.attempts for job in retry)
+        delay = self.backoff * 2 ** (attempts - 1) * (0.5 + random.random())
+        asyncio.get_running_loop().call_later(delay, self._requeue, retry)
+
+    def _requeue(self, jobs: list[SMSJob]) -> None:
+        for job in jobs:
+            self.enqueue(job)
+
+    async def send(self, batch: list[SMSJob]) -> None:
+        """发送一批短信,熔断时等待,失败时安排重试"""
+        while (wait := self.breaker.retry_after()) > 0:
+            await asyncio.sleep(wait)
+        try:
+            await self.provider.send_batch(batch)
+        except Exception as e:
+            logger.error(f"短信批量发送失败({len(batch)} 条): {e}")
+            self.breaker.record_failure()
+            self._schedule_retry(batch)
+        else:
+            self.breaker.record_success()
+            self.sent += len(batch)
+
+    async def run(self) -> None:
+        """持续从队列取批发送,作为后台任务运行"""
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self.send(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "breaker": self.breaker.state,
+        }
+
+    async def close(self) -> None:
+        await self.provider.close()
+
+
+def create_sms_provider() -> SMSProvider:
+    """按配置创建短信供应商"""
+    if settings.SMS_PROVIDER == "aliyun":
+        return AliyunSMSProvider(
+            access_key_id=settings.ALIYUN_SMS_ACCESS_KEY_ID,
+            access_key_secret=settings.ALIYUN_SMS_ACCESS_KEY_SECRET,
+            sign_name=settings.ALIYUN_SMS_SIGN_NAME,
+            template_code=settings.ALIYUN_SMS_TEMPLATE_CODE,
+            timeout=settings.SMS_HTTP_TIMEOUT_SECONDS,
+            max_connections=settings.SMS_HTTP_MAX_CONNECTIONS,
+        )
+    return StubSMSProvider(
+        latency=settings.SMS_STUB_LATENCY_SECONDS,
+        failure_rate=settings.SMS_STUB_FAILURE_RATE,
+    )
+
+
+def create_sms_dispatcher() -> SMSDispatcher:
+    """按配置创建短信dispatcher"""
+    batch_size = settings.SMS_BATCH_SIZE
+    if settings.SMS_PROVIDER == "aliyun":
+        batch_size = min(batch_size, AliyunSMSProvider.MAX_BATCH_SIZE)
+    return SMSDispatcher(
+        create_sms_provider(),
+        batch_size=batch_size,
+        batch_wait=settings.SMS_BATCH_WAIT_SECONDS,
+        max_retries=settings.SMS_MAX_RETRIES,
+        backoff=settings.SMS_RETRY_BACKOFF_SECONDS,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.SMS_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.SMS_BREAKER_RESET_SECONDS,
+        ),
+        queue_maxsize=settings.SMS_QUEUE_MAXSIZE,
+    )
+
+
+sms_dispatcher = create_sms_dispatcher()
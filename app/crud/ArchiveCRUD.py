@@ -0,0 +1,222 @@
+from datetime import datetime, timezone
+from typing import List
+from uuid import UUID
+from sqlalchemy import Table, delete, exists, func, insert, literal, select
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.auth_cache import invalidate_user
+from app.models.table import TODO, GuaReading, User, todo_archive, user_archive
+
+todo_table: Table = TODO.__table__
+user_table: Table = User.__table__
+
+
+def deleted_todo_ids_stmt(cutoff: datetime, batch_size: int):
+    """一批删除时间早于cutoff的TODO，由 ix_todo_updated_at_deleted 部分索引支撑"""
+    return (
+        select(TODO.id)
+        .where(TODO.is_deleted == True, TODO.updated_at < cutoff)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def orphaned_todo_ids_stmt(cutoff: datetime, batch_size: int):
+    """一批属于已注销用户的未删除TODO，用户归档前需要先把这些TODO移走"""
+    deleted_users = select(User.id).where(User.is_deleted == True, User.updated_at < cutoff)
+    return (
+        select(TODO.id)
+        .where(TODO.is_deleted == False, TODO.user_id.in_(deleted_users))
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def archivable_user_ids_stmt(cutoff: datetime, batch_size: int):
+    """一批注销时间早于cutoff、且已经没有TODO和起卦记录引用的用户
+
+    有起卦记录的用户不归档，起卦记录只追加，没有对应的归档表
+    """
+    return (
+        select(User.id)
+        .where(
+            User.is_deleted == True,
+            User.updated_at < cutoff,
+            ~exists().where(TODO.user_id == User.id),
+            ~exists().where(GuaReading.user_id == User.id),
+        )
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def move_rows_stmts(
+    dialect_name: str,
+    source: Table,
+    target: Table,
+    ids: List[UUID],
+    archived: bool,
+    **values,
+) -> list:
+    """构造把一批记录从source搬到target的语句
+
+    PostgreSQL 用一条 WITH moved AS (DELETE ... RETURNING) INSERT ... SELECT，
+    只扫描一次源表；其他数据库不支持CTE中的DML，拆成INSERT ... SELECT和DELETE两条，
+    调用方在同一事务中执行。
+
+    Args:
+        dialect_name: 数据库方言
+        source: 源表
+        target: 目标表
+        ids: 本批记录ID
+        archived: 目标是否为归档表，是则写入归档时间
+        values: 搬运时覆盖的列值，如 is_deleted=False
+
+    Returns:
+        list: 按顺序执行的语句
+    """
+    names = [column.name for column in source.columns if column.name in target.columns]
+
+    def projection(table) -> list:
+        columns = [literal(values[name], table.c[name].type).label(name) if name in values
+                   else table.c[name] for name in names]
+        if archived:
+            columns.append(func.now().label("archived_at"))
+        return columns
+
+    target_names = names + ["archived_at"] if archived else names
+    if dialect_name == "postgresql":
+        moved = (
+            delete(source)
+            .where(source.c.id.in_(ids))
+            .returning(*(source.c[name] for name in names))
+            .cte("moved")
+        )
+        return [insert(target).from_select(target_names, select(*projection(moved)))]
+    return [
+        insert(target).from_select(
+            target_names, select(*projection(source)).where(source.c.id.in_(ids))),
+        delete(source).where(source.c.id.in_(ids)),
+    ]
+
+
+class ArchiveCRUD:
+    """把软删除的TODO和用户搬到归档表，以及从归档表恢复
+
+    每批在一个事务中完成选取和搬运并立即提交，锁持有时间和事务大小与批大小成正比。
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def _move(self, source: Table, target: Table, ids: List[UUID], archived: bool, **values) -> int:
+        for stmt in move_rows_stmts(
+                self.session.bind.dialect.name, source, target, ids, archived, **values):
+            self.session.exec(stmt)
+        return len(ids)
+
+    def _archive_batches(self, ids_stmt, source: Table, target: Table, batch_size: int,
+                         max_batches: int | None) -> int:
+        count, batches = 0, 0
+        while max_batches is None or batches < max_batches:
+            ids = list(self.session.exec(ids_stmt).scalars().all())
+            if ids:
+                count += self._move(source, target, ids, archived=True)
+            self.session.commit()
+            batches += 1
+            if len(ids) < batch_size:
+                break
+        return count
+
+    def archive_todos(self, cutoff: datetime, batch_size: int = 1000,
+                      max_batches: int | None = None) -> int:
+        """归档删除时间早于cutoff的TODO，以及已注销用户名下的TODO，返回归档条数"""
+        return (
+            self._archive_batches(deleted_todo_ids_stmt(cutoff, batch_size),
+                                  todo_table, todo_archive, batch_size, max_batches)
+            + self._archive_batches(orphaned_todo_ids_stmt(cutoff, batch_size),
+                                    todo_table, todo_archive, batch_size, max_batches)
+        )
+
+    def archive_users(self, cutoff: datetime, batch_size: int = 1000,
+                      max_batches: int | None = None) -> int:
+        """归档注销时间早于cutoff的用户，需先调用archive_todos，返回归档条数"""
+        return self._archive_batches(archivable_user_ids_stmt(cutoff, batch_size),
+                                     user_table, user_archive, batch_size, max_batches)
+
+    def restore_todos(self, todo_ids: List[UUID]) -> int:
+        """把归档的TODO恢复为未删除状态，返回恢复条数
+
+        updated_at 更新为恢复时间，增量同步(/todo/changes)的客户端才能拉到；
+        内容与现有TODO重复时违反唯一约束，整批回滚
+        """
+        ids = list(self.session.exec(
+            select(todo_archive.c.id).where(todo_archive.c.id.in_(todo_ids))).scalars().all())
+        if ids:
+            self._move(todo_archive, todo_table, ids, archived=False,
+                       is_deleted=False, updated_at=datetime.now(timezone.utc))
+        self.session.commit()
+        return len(ids)
+
+    def restore_user(self, user_id: UUID) -> int:
+        """恢复归档的用户及其全部归档TODO，返回恢复条数
+
+        用户恢复为未注销状态；TODO保留归档前的删除标记，与注销前看到的一致，
+        updated_at 更新为恢复时间
+        """
+        if self.session.exec(
+                select(user_archive.c.id).where(user_archive.c.id == user_id)).first() is None:
+            return 0
+        now = datetime.now(timezone.utc)
+        self._move(user_archive, user_table, [user_id], archived=False,
+                   is_deleted=False, updated_at=now)
+        todo_ids = list(self.session.exec(
+            select(todo_archive.c.id).where(todo_archive.c.user_id == user_id)).scalars().all())
+        if todo_ids:
+            self._move(todo_archive, todo_table, todo_ids, archived=False, updated_at=now)
+        self.session.commit()
+        invalidate_user(user_id)
+        return 1 + len(todo_ids)
+
+
+class AsyncArchiveCRUD:
+    """ArchiveCRUD的异步版本，供后台任务使用"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def _move(self, source: Table, target: Table, ids: List[UUID], archived: bool,
+                    **values) -> int:
+        for stmt in move_rows_stmts(
+                self.session.bind.dialect.name, source, target, ids, archived, **values):
+            await self.session.exec(stmt)
+        return len(ids)
+
+    async def _archive_batches(self, ids_stmt, source: Table, target: Table, batch_size: int,
+                               max_batches: int | None) -> int:
+        count, batches = 0, 0
+        while max_batches is None or batches < max_batches:
+            ids = list((await self.session.exec(ids_stmt)).scalars().all())
+            if ids:
+                count += await self._move(source, target, ids, archived=True)
+            await self.session.commit()
+            batches += 1
+            if len(ids) < batch_size:
+                break
+        return count
+
+    async def archive_todos(self, cutoff: datetime, batch_size: int = 1000,
+                            max_batches: int | None = None) -> int:
+        """归档删除时间早于cutoff的TODO，以及已注销用户名下的TODO，返回归档条数"""
+        return (
+            await self._archive_batches(deleted_todo_ids_stmt(cutoff, batch_size),
+                                        todo_table, todo_archive, batch_size, max_batches)
+            + await self._archive_batches(orphaned_todo_ids_stmt(cutoff, batch_size),
+                                          todo_table, todo_archive, batch_size, max_batches)
+        )
+
+    async def archive_users(self, cutoff: datetime, batch_size: int = 1000,
+                            max_batches: int | None = None) -> int:
+        """归档注销时间早于cutoff的用户，需先调用archive_todos，返回归档条数"""
+        return await self._archive_batches(archivable_user_ids_stmt(cutoff, batch_size),
+                                           user_table, user_archive, batch_size, max_batches)
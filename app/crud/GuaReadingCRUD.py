@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import List
+from uuid import UUID
+from sqlalchemy import func, tuple_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.table import GuaReading
+
+
+class AsyncGuaReadingCRUD:
+    """起卦记录CRUD，只供async def路由使用"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_readings(
+        self,
+        user_id: UUID,
+        codes: List[int],
+        masks: List[int],
+    ) -> List[GuaReading]:
+        """批量保存起卦记录，一次提交"""
+        readings = [
+            GuaReading(user_id=user_id, hexagram_code=code, changing_mask=mask)
+            for code, mask in zip(codes, masks)
+        ]
+        self.session.add_all(readings)
+        await self.session.commit()
+        return readings
+
+    async def get_history(
+        self,
+        user_id: UUID,
+        limit: int = 20,
+        after: tuple[datetime, int] | None = None,
+    ) -> tuple[List[GuaReading], tuple[datetime, int] | None]:
+        """按 (created_at, id) 倒序分页获取起卦历史，返回当前页和下一页的起点"""
+        statement = select(GuaReading).where(GuaReading.user_id == user_id)
+        if after is not None:
+            statement = statement.where(
+                tuple_(GuaReading.created_at, GuaReading.id) < tuple_(*after))
+        statement = statement.order_by(
+            GuaReading.created_at.desc(), GuaReading.id.desc()).limit(limit + 1)
+        readings = (await self.session.exec(statement)).all()
+        if len(readings) <= limit:
+            return readings, None
+        page = readings[:limit]
+        return page, (page[-1].created_at, page[-1].id)
+
+    async def get_hexagram_counts(self, user_id: UUID) -> dict[int, int]:
+        """在数据库中按本卦分组统计该用户每一卦的出现次数，返回 编码 → 次数"""
+        statement = (
+            select(GuaReading.hexagram_code, func.count())
+            .where(GuaReading.user_id == user_id)
+            .group_by(GuaReading.hexagram_code)
+        )
+        rows = (await self.session.exec(statement)).all()
+        return {code: count for code, count in rows}
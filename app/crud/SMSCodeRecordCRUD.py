@@ -1,9 +1,46 @@
 from datetime import datetime, timedelta
 from typing import Optional, List
-from sqlmodel import Session, select
+from sqlmodel import Session, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.table import SMSCodeRecord
 
 
+def expired_records_delete_stmt(batch_size: int):
+    """构造删除一批过期验证码记录的语句
+
+    PostgreSQL 的 DELETE 不支持 LIMIT，用子查询限定每批的行数
+    """
+    expired_ids = (
+        select(SMSCodeRecord.id)
+        .where(SMSCodeRecord.expire_time <= datetime.now())
+        .limit(batch_size)
+    )
+    return (
+        delete(SMSCodeRecord)
+        .where(SMSCodeRecord.id.in_(expired_ids))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def verify_sms_code_stmt(phone_number: str, sms_code: int):
+    """构造校验验证码的语句
+
+    取最新一条记录、比对验证码、判断过期在一条SQL中完成，
+    由 (phone_number, created_at DESC) 索引支撑，只读取一行
+    """
+    latest = (
+        select(SMSCodeRecord.sms_code, SMSCodeRecord.expire_time)
+        .where(SMSCodeRecord.phone_number == phone_number)
+        .order_by(SMSCodeRecord.created_at.desc())
+        .limit(1)
+        .subquery()
+    )
+    return select(latest.c.sms_code).where(
+        latest.c.sms_code == sms_code,
+        latest.c.expire_time > datetime.now()
+    )
+
+
 class SMSCodeRecordCRUD:
     def __init__(self, session: Session):
         self.session = session
@@ -36,6 +73,7 @@ class SMSCodeRecordCRUD:
             select(SMSCodeRecord)
             .where(SMSCodeRecord.phone_number == phone_number)
             .order_by(SMSCodeRecord.created_at.desc())
+            .limit(1)
         ).first()
 
     def get_active_sms_code_records(
@@ -49,19 +87,20 @@ class SMSCodeRecordCRUD:
         )
         return self.session.exec(query).all()
 
-    def delete_expired_records(self) -> int:
-        """删除所有过期的验证码记录，返回删除的记录数"""
-        stmt = select(SMSCodeRecord).where(
-            SMSCodeRecord.expire_time <= datetime.now())
-        expired_records = self.session.exec(stmt).all()
+    def delete_expired_records(self, batch_size: int = 5000) -> int:
+        """分批删除所有过期的验证码记录，返回删除的记录数
 
+        每批执行一条 DELETE ... WHERE id IN (SELECT id ... LIMIT n) 并单独提交，
+        不把记录加载到Python中，也避免长事务和大量行锁
+        """
         count = 0
-        for record in expired_records:
-            self.session.delete(record)
-            count += 1
-
-        self.session.commit()
-        return count
+        while True:
+            deleted = self.session.exec(
+                expired_records_delete_stmt(batch_size)).rowcount
+            self.session.commit()
+            count += deleted
+            if deleted < batch_size:
+                return count
 
     def delete_sms_code_record(self, record_id: int) -> bool:
         """删除指定的验证码记录"""
@@ -78,11 +117,84 @@ class SMSCodeRecordCRUD:
         phone_number: str,
         sms_code: int,
     ) -> bool:
-        """验证短信验证码是否有效"""
-        active_records = self.get_active_sms_code_records(phone_number)
+        """验证短信验证码是否有效，只有最新一条且未过期的验证码有效"""
+        return self.session.exec(
+            verify_sms_code_stmt(phone_number, sms_code)).first() is not None
+
+
+class AsyncSMSCodeRecordCRUD:
+    """SMSCodeRecordCRUD的异步版本，供async def路由使用"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_sms_code_record(
+        self,
+        phone_number: str,
+        sms_code: int,
+    ) -> SMSCodeRecord:
+        """创建短信验证码记录"""
+        expire_time = datetime.now() + timedelta(minutes=1)
+        record = SMSCodeRecord(
+            phone_number=phone_number,
+            sms_code=sms_code,
+            expire_time=expire_time,
+        )
+        self.session.add(record)
+        await self.session.commit()
+        await self.session.refresh(record)
+        return record
 
-        for record in active_records:
-            if record.sms_code == sms_code and not record.is_expired():
-                return True
+    async def get_sms_code_record(self, record_id: int) -> Optional[SMSCodeRecord]:
+        """根据ID获取短信验证码记录"""
+        return await self.session.get(SMSCodeRecord, record_id)
 
-        return False
+    async def get_latest_sms_code_record(self, phone_number: str) -> Optional[SMSCodeRecord]:
+        """获取指定手机号最新的验证码记录"""
+        return (await self.session.exec(
+            select(SMSCodeRecord)
+            .where(SMSCodeRecord.phone_number == phone_number)
+            .order_by(SMSCodeRecord.created_at.desc())
+            .limit(1)
+        )).first()
+
+    async def get_active_sms_code_records(
+        self,
+        phone_number: str,
+    ) -> List[SMSCodeRecord]:
+        """获取未过期的验证码记录"""
+        query = select(SMSCodeRecord).where(
+            SMSCodeRecord.phone_number == phone_number,
+            SMSCodeRecord.expire_time > datetime.now()
+        )
+        return (await self.session.exec(query)).all()
+
+    async def delete_expired_records(self, batch_size: int = 5000) -> int:
+        """分批删除所有过期的验证码记录，返回删除的记录数"""
+        count = 0
+        while True:
+            deleted = (await self.session.exec(
+                expired_records_delete_stmt(batch_size))).rowcount
+            await self.session.commit()
+            count += deleted
+            if deleted < batch_size:
+                return count
+
+    async def delete_sms_code_record(self, record_id: int) -> bool:
+        """删除指定的验证码记录"""
+        record = await self.get_sms_code_record(record_id)
+        if not record:
+            return False
+
+        await self.session.delete(record)
+        await self.session.commit()
+        return True
+
+    async def verify_sms_code(
+        self,
+        phone_number: str,
+        sms_code: int,
+    ) -> bool:
+        """验证短信验证码是否有效，只有最新一条且未过期的验证码有效"""
+        return (await self.session.exec(
+            verify_sms_code_stmt(phone_number, sms_code))).first() is not None
@@ -1,8 +1,145 @@
+from datetime import datetime
 from typing import Optional, List
-from sqlmodel import Session, select
+from uuid import UUID
+from sqlalchemy import tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.table import TODO
 
 
+def list_todos_stmt(
+    user_id: str,
+    limit: int,
+    after: tuple[datetime, UUID] | None = None,
+    completed: bool | None = None,
+    keyword: str | None = None,
+):
+    """构造按 (created_at, id) 倒序分页的TODO查询
+
+    使用keyset分页：从上一页最后一条记录之后继续读，不使用OFFSET，
+    由 (user_id, created_at, id) WHERE is_deleted = false 部分索引支撑。
+    多取一条用来判断是否还有下一页。
+    """
+    statement = select(TODO).where(
+        TODO.is_deleted == False,
+        TODO.user_id == user_id
+    )
+    if after is not None:
+        statement = statement.where(
+            tuple_(TODO.created_at, TODO.id) < tuple_(*after))
+    if completed is not None:
+        statement = statement.where(TODO.completed == completed)
+    if keyword:
+        statement = statement.where(
+            TODO.text.contains(keyword, autoescape=True))
+    return statement.order_by(
+        TODO.created_at.desc(), TODO.id.desc()).limit(limit + 1)
+
+
+def split_page(
+    todos: List[TODO],
+    limit: int
+) -> tuple[List[TODO], tuple[datetime, UUID] | None]:
+    """把多取一条的查询结果拆分为当前页和下一页的起点"""
+    if len(todos) <= limit:
+        return todos, None
+    page = todos[:limit]
+    return page, (page[-1].created_at, page[-1].id)
+
+
+def todo_changes_stmt(
+    user_id: str,
+    limit: int,
+    until: datetime,
+    after: tuple[datetime, UUID] | None = None,
+):
+    """构造按 (updated_at, id) 正序读取变更的TODO查询
+
+    包含已软删除的记录，客户端据此删除本地副本。
+    只读取 updated_at 早于until的记录：updated_at 由各worker写入时取本地时间，
+    提交顺序与时间戳顺序不一定一致，留出时间窗口避免游标越过尚未提交的修改。
+    由 (user_id, updated_at, id) 索引支撑，多取一条用来判断是否还有下一页。
+    """
+    statement = select(TODO).where(
+        TODO.user_id == user_id,
+        TODO.updated_at < until
+    )
+    if after is not None:
+        statement = statement.where(
+            tuple_(TODO.updated_at, TODO.id) > tuple_(*after))
+    return statement.order_by(
+        TODO.updated_at, TODO.id).limit(limit + 1)
+
+
+def split_changes(
+    todos: List[TODO],
+    limit: int
+) -> tuple[List[TODO], tuple[datetime, UUID] | None]:
+    """把多取一条的变更拆分为当前页和下一页的起点，没有更多变更时返回None"""
+    if len(todos) <= limit:
+        return todos, None
+    page = todos[:limit]
+    return page, (page[-1].updated_at, page[-1].id)
+
+
+def update_todo_stmt(todo_id: str, user_id: str, **values):
+    """构造更新单个TODO的语句
+
+    归属校验、更新和取回结果在一条 UPDATE ... RETURNING 中完成，
+    不存在、已删除或不属于该用户时不返回任何行
+    """
+    return (
+        update(TODO)
+        .where(
+            TODO.id == todo_id,
+            TODO.user_id == user_id,
+            TODO.is_deleted == False
+        )
+        .values(**values)
+        .returning(TODO)
+    )
+
+
+def bulk_insert_todos_stmt(dialect_name: str, texts: List[str], user_id: str):
+    """构造批量创建TODO的多行 INSERT ... ON CONFLICT DO NOTHING 语句
+
+    与已有TODO内容冲突的行会被跳过，不会让整批失败；
+    RETURNING 只返回真正插入的行，用来生成逐条结果
+    """
+    insert = sqlite.insert if dialect_name == "sqlite" else postgresql.insert
+    rows = [TODO(text=text, user_id=user_id).model_dump() for text in texts]
+    return (
+        insert(TODO)
+        .values(rows)
+        .on_conflict_do_nothing()
+        .returning(TODO.id, TODO.text)
+    )
+
+
+def bulk_update_todos_stmt(todo_ids: List[UUID], user_id: str, **values):
+    """构造批量更新TODO的 UPDATE ... WHERE id IN (...) RETURNING id 语句"""
+    return (
+        update(TODO)
+        .where(
+            TODO.id.in_(todo_ids),
+            TODO.user_id == user_id,
+            TODO.is_deleted == False
+        )
+        .values(**values)
+        .returning(TODO.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def group_by_status(items: List[tuple[UUID, bool]]) -> dict[bool, List[UUID]]:
+    """按目标完成状态分组，每组只需要一条UPDATE"""
+    groups: dict[bool, List[UUID]] = {}
+    for todo_id, completed in items:
+        groups.setdefault(completed, []).append(todo_id)
+    return groups
+
+
 class TodoCRUD:
     def __init__(self, session: Session):
         self.session = session
@@ -32,6 +169,31 @@ class TodoCRUD:
         )
         return self.session.exec(statement).all()
 
+    def list_todos(
+        self,
+        user_id: str,
+        limit: int = 20,
+        after: tuple[datetime, UUID] | None = None,
+        completed: bool | None = None,
+        keyword: str | None = None,
+    ) -> tuple[List[TODO], tuple[datetime, UUID] | None]:
+        """分页获取该用户的TODO，返回当前页和下一页的起点"""
+        todos = self.session.exec(
+            list_todos_stmt(user_id, limit, after, completed, keyword)).all()
+        return split_page(todos, limit)
+
+    def get_changes(
+        self,
+        user_id: str,
+        until: datetime,
+        limit: int = 100,
+        after: tuple[datetime, UUID] | None = None,
+    ) -> tuple[List[TODO], tuple[datetime, UUID] | None]:
+        """获取该用户在游标之后变更的TODO（含软删除），返回当前页和下一页的起点"""
+        todos = self.session.exec(
+            todo_changes_stmt(user_id, limit, until, after)).all()
+        return split_changes(todos, limit)
+
     def get_completed_todos(self, user_id: str) -> List[TODO]:
         """获取该用户所有已完成的TODO"""
         statement = select(TODO).where(
@@ -52,35 +214,171 @@ class TodoCRUD:
 
     def update_todo_status(self, todo_id: str, completed: bool, user_id: str) -> Optional[TODO]:
         """更新TODO的完成状态，只能更新属于该用户的TODO"""
-        todo = self.get_todo(todo_id, user_id)
-        if not todo:
-            return None
-            
-        todo.completed = completed
-        self.session.add(todo)
+        todo = self.session.exec(update_todo_stmt(
+            todo_id, user_id, completed=completed)).scalars().first()
         self.session.commit()
-        self.session.refresh(todo)
         return todo
 
     def update_todo_text(self, todo_id: str, text: str, user_id: str) -> Optional[TODO]:
         """更新TODO的内容，只能更新属于该用户的TODO"""
-        todo = self.get_todo(todo_id, user_id)
-        if not todo:
-            return None
-        
-        todo.text = text
-        self.session.add(todo)
+        todo = self.session.exec(update_todo_stmt(
+            todo_id, user_id, text=text)).scalars().first()
         self.session.commit()
-        self.session.refresh(todo)
         return todo
 
     def delete_todo(self, todo_id: str, user_id: str) -> bool:
         """软删除TODO，只能删除属于该用户的TODO"""
-        todo = self.get_todo(todo_id, user_id)
-        if not todo:
-            return False
-        
-        todo.is_deleted = True
-        self.session.add(todo)
+        todo = self.session.exec(update_todo_stmt(
+            todo_id, user_id, is_deleted=True)).scalars().first()
+        self.session.commit()
+        return todo is not None
+
+    def bulk_create_todos(self, texts: List[str], user_id: str) -> dict[str, UUID]:
+        """批量创建TODO，返回成功创建的 内容 → ID"""
+        rows = self.session.exec(bulk_insert_todos_stmt(
+            self.session.bind.dialect.name, texts, user_id)).all()
+        self.session.commit()
+        return {text: todo_id for todo_id, text in rows}
+
+    def bulk_update_todo_status(
+        self,
+        items: List[tuple[UUID, bool]],
+        user_id: str
+    ) -> set[UUID]:
+        """批量更新TODO的完成状态，在同一事务中提交，返回成功更新的ID"""
+        updated: set[UUID] = set()
+        for completed, todo_ids in group_by_status(items).items():
+            updated.update(self.session.exec(bulk_update_todos_stmt(
+                todo_ids, user_id, completed=completed)).scalars().all())
         self.session.commit()
-        return True 
\ No newline at end of file
+        return updated
+
+    def bulk_delete_todos(self, todo_ids: List[UUID], user_id: str) -> set[UUID]:
+        """批量软删除TODO，返回成功删除的ID"""
+        deleted = set(self.session.exec(bulk_update_todos_stmt(
+            todo_ids, user_id, is_deleted=True)).scalars().all())
+        self.session.commit()
+        return deleted
+
+
+class AsyncTodoCRUD:
+    """TodoCRUD的异步版本，供async def路由使用"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_todo(self, text: str, user_id: str) -> TODO:
+        """创建新的TODO"""
+        new_todo = TODO(text=text, user_id=user_id)
+        self.session.add(new_todo)
+        await self.session.commit()
+        await self.session.refresh(new_todo)
+        return new_todo
+
+    async def get_todo(self, todo_id: str, user_id: str) -> TODO | None:
+        """根据ID获取单个TODO，只能获取属于该用户的TODO"""
+        stmt = select(TODO).where(
+            TODO.id == todo_id,
+            TODO.is_deleted == False,
+            TODO.user_id == user_id
+        )
+        return (await self.session.exec(stmt)).first()
+
+    async def get_all_todos(self, user_id: str) -> List[TODO]:
+        """获取该用户所有未删除的TODO"""
+        statement = select(TODO).where(
+            TODO.is_deleted == False,
+            TODO.user_id == user_id
+        )
+        return (await self.session.exec(statement)).all()
+
+    async def list_todos(
+        self,
+        user_id: str,
+        limit: int = 20,
+        after: tuple[datetime, UUID] | None = None,
+        completed: bool | None = None,
+        keyword: str | None = None,
+    ) -> tuple[List[TODO], tuple[datetime, UUID] | None]:
+        """分页获取该用户的TODO，返回当前页和下一页的起点"""
+        todos = (await self.session.exec(
+            list_todos_stmt(user_id, limit, after, completed, keyword))).all()
+        return split_page(todos, limit)
+
+    async def get_changes(
+        self,
+        user_id: str,
+        until: datetime,
+        limit: int = 100,
+        after: tuple[datetime, UUID] | None = None,
+    ) -> tuple[List[TODO], tuple[datetime, UUID] | None]:
+        """获取该用户在游标之后变更的TODO（含软删除），返回当前页和下一页的起点"""
+        todos = (await self.session.exec(
+            todo_changes_stmt(user_id, limit, until, after))).all()
+        return split_changes(todos, limit)
+
+    async def get_completed_todos(self, user_id: str) -> List[TODO]:
+        """获取该用户所有已完成的TODO"""
+        statement = select(TODO).where(
+            TODO.is_deleted == False,
+            TODO.completed == True,
+            TODO.user_id == user_id
+        )
+        return (await self.session.exec(statement)).all()
+
+    async def get_not_completed_todos(self, user_id: str) -> List[TODO]:
+        """获取该用户所有未完成的TODO"""
+        statement = select(TODO).where(
+            TODO.is_deleted == False,
+            TODO.completed == False,
+            TODO.user_id == user_id
+        )
+        return (await self.session.exec(statement)).all()
+
+    async def update_todo_status(self, todo_id: str, completed: bool, user_id: str) -> Optional[TODO]:
+        """更新TODO的完成状态，只能更新属于该用户的TODO"""
+        todo = (await self.session.exec(update_todo_stmt(
+            todo_id, user_id, completed=completed))).scalars().first()
+        await self.session.commit()
+        return todo
+
+    async def update_todo_text(self, todo_id: str, text: str, user_id: str) -> Optional[TODO]:
+        """更新TODO的内容，只能更新属于该用户的TODO"""
+        todo = (await self.session.exec(update_todo_stmt(
+            todo_id, user_id, text=text))).scalars().first()
+        await self.session.commit()
+        return todo
+
+    async def delete_todo(self, todo_id: str, user_id: str) -> bool:
+        """软删除TODO，只能删除属于该用户的TODO"""
+        todo = (await self.session.exec(update_todo_stmt(
+            todo_id, user_id, is_deleted=True))).scalars().first()
+        await self.session.commit()
+        return todo is not None
+
+    async def bulk_create_todos(self, texts: List[str], user_id: str) -> dict[str, UUID]:
+        """批量创建TODO，返回成功创建的 内容 → ID"""
+        rows = (await self.session.exec(bulk_insert_todos_stmt(
+            self.session.bind.dialect.name, texts, user_id))).all()
+        await self.session.commit()
+        return {text: todo_id for todo_id, text in rows}
+
+    async def bulk_update_todo_status(
+        self,
+        items: List[tuple[UUID, bool]],
+        user_id: str
+    ) -> set[UUID]:
+        """批量更新TODO的完成状态，在同一事务中提交，返回成功更新的ID"""
+        updated: set[UUID] = set()
+        for completed, todo_ids in group_by_status(items).items():
+            updated.update((await self.session.exec(bulk_update_todos_stmt(
+                todo_ids, user_id, completed=completed))).scalars().all())
+        await self.session.commit()
+        return updated
+
+    async def bulk_delete_todos(self, todo_ids: List[UUID], user_id: str) -> set[UUID]:
+        """批量软删除TODO，返回成功删除的ID"""
+        deleted = set((await self.session.exec(bulk_update_todos_stmt(
+            todo_ids, user_id, is_deleted=True))).scalars().all())
+        await self.session.commit()
+        return deleted
@@ -1,7 +1,9 @@
 from typing import Optional, List
 from uuid import UUID
 from sqlmodel import Session, select
-from app.core.security import get_password_hash
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.auth_cache import invalidate_user
+from app.core.security import get_password_hash, hash_password_async
 from app.models.table import User
 from app.models.base_models.UserBase import UserCreate
 from app.tool.random import RandomGenerator
@@ -98,6 +100,7 @@ class UserCRUD:
         self.session.add(user)
         self.session.commit()
         self.session.refresh(user)
+        invalidate_user(user_id)
         return user
 
     def delete_user(self, user_id: UUID) -> bool:
@@ -109,4 +112,110 @@ class UserCRUD:
         user.is_deleted = True
         self.session.add(user)
         self.session.commit()
+        invalidate_user(user_id)
+        return True
+
+
+class AsyncUserCRUD:
+    """UserCRUD的异步版本，供async def路由使用"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_user(self, user_id: str) -> User | None:
+        """根据UUID获取用户"""
+        return await self.session.get(User, user_id)
+
+    async def get_user_by_phone(self, phone_number: str) -> Optional[User]:
+        """根据手机号获取用户"""
+        return (await self.session.exec(
+            select(User)
+            .where(User.phone_number == phone_number, User.is_deleted == False)
+        )).first()
+
+    async def get_user_by_username(self, username: str) -> Optional[User]:
+        """根据用户名获取用户"""
+        return (await self.session.exec(
+            select(User)
+            .where(User.username == username, User.is_deleted == False)
+        )).first()
+
+    async def get_users(
+        self,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[User]:
+        """获取用户列表"""
+        statement = select(User).where(User.is_deleted ==
+                                       False).offset(skip).limit(limit)
+        return (await self.session.exec(statement)).all()
+
+    async def create_user(self, phone_number: str, with_password: bool = True) -> User:
+        """创建新用户
+
+        Args:
+            phone_number: 手机号
+            with_password: 是否生成随机密码并哈希。仅使用短信登录的用户
+                永远用不到这个密码,传False可跳过bcrypt,hashed_password留空
+        """
+        username = RandomGenerator().generate_username(prefix="Fastapi模版App")
+        if not with_password:
+            new_user = User(
+                phone_number=phone_number,
+                username=username,
+                is_active=True,
+                is_superuser=False
+            )
+        else:
+            # 验证数据并在进程池中哈希密码
+            new = UserCreate(
+                phone_number=phone_number,
+                username=username,
+                password=RandomGenerator().generate_password(length=12),
+                is_active=True,
+                is_superuser=False
+            )
+            new_user = User.model_validate(
+                new,
+                update={"hashed_password": await hash_password_async(new.password)}
+            )
+        self.session.add(new_user)
+        await self.session.commit()
+        await self.session.refresh(new_user)
+        return new_user
+
+    async def update_user(
+        self,
+        user_id: UUID,
+        update_data: dict
+    ) -> Optional[User]:
+        """更新用户信息"""
+        user = await self.get_user(user_id)
+        if not user or user.is_deleted:
+            return None
+
+        # 如果更新数据中包含密码，需要先在进程池中哈希处理
+        if "password" in update_data:
+            update_data["hashed_password"] = await hash_password_async(
+                update_data.pop("password"))
+
+        for key, value in update_data.items():
+            setattr(user, key, value)
+
+        self.session.add(user)
+        await self.session.commit()
+        await self.session.refresh(user)
+        invalidate_user(user_id)
+        return user
+
+    async def delete_user(self, user_id: UUID) -> bool:
+        """软删除用户"""
+        user = await self.get_user(user_id)
+        if not user or user.is_deleted:
+            return False
+
+        user.is_deleted = True
+        self.session.add(user)
+        await self.session.commit()
+        invalidate_user(user_id)
         return True
@@ -0,0 +1,87 @@
+"""起卦引擎。
+
+每一爻的取值为6(老阴)、7(少阳)、8(少阴)、9(老阳),6和9为变爻。
+不同起卦方法只是四种取值的概率不同:
+    - 金钱卦(coin): 三枚铜钱,6:7:8:9 = 1:3:3:1
+    - 蓍草卦(yarrow): 大衍筮法,6:7:8:9 = 1:5:7:3
+
+批量起卦时一次生成 N×6 的随机矩阵,用NumPy向量化计算本卦编码和变爻掩码,
+再查 tables.READINGS 得到结果。传入seed时结果可复现。
+"""
+
+from dataclasses import dataclass
+from typing import Literal
+import numpy as np
+from app.gua.tables import reading_for
+
+CastMethod = Literal["coin", "yarrow"]
+
+# 各方法下 6、7、8、9 的累计概率
+_CUMULATIVE_PROBS: dict[str, np.ndarray] = {
+    "coin": np.cumsum([1, 3, 3, 1]) / 8,
+    "yarrow": np.cumsum([1, 5, 7, 3]) / 16,
+}
+
+# 第i爻在编码中的权重
+_LINE_WEIGHTS = 1 << np.arange(6)
+
+# 未指定seed时复用同一个生成器,省去每次创建的开销
+_default_rng = np.random.default_rng()
+
+
+@dataclass(frozen=True, slots=True)
+class CastResult:
+    """批量起卦结果
+
+    - lines: N×6 的爻值矩阵,自下而上
+    - codes: 本卦编码
+    - masks: 变爻掩码
+    """
+    lines: np.ndarray
+    codes: np.ndarray
+    masks: np.ndarray
+
+    def readings(self) -> list[dict]:
+        """
+        转换为卦象结果列表
+
+        Returns:
+            list[dict]: 每次起卦的完整结果
+        """
+        return [reading_for(code, mask)
+                for code, mask in zip(self.codes.tolist(), self.masks.tolist())]
+
+
+def cast_lines(count: int, method: CastMethod = "coin", seed: int | None = None) -> np.ndarray:
+    """
+    批量生成爻值
+
+    Args:
+        count: 起卦次数
+        method: 起卦方法
+        seed: 随机种子,相同种子得到相同结果
+
+    Returns:
+        np.ndarray: count×6 的爻值矩阵,取值6~9
+    """
+    rng = _default_rng if seed is None else np.random.default_rng(seed)
+    draws = rng.random((count, 6))
+    return np.searchsorted(_CUMULATIVE_PROBS[method], draws, side="right").astype(np.int8) + 6
+
+
+def cast(count: int = 1, method: CastMethod = "coin", seed: int | None = None) -> CastResult:
+    """
+    批量起卦
+
+    Args:
+        count: 起卦次数
+        method: 起卦方法
+        seed: 随机种子,相同种子得到相同结果
+
+    Returns:
+        CastResult: 爻值、本卦编码和变爻掩码
+    """
+    lines = cast_lines(count, method, seed)
+    codes = (lines & 1) @ _LINE_WEIGHTS
+    masks = ((lines == 6) | (lines == 9)) @ _LINE_WEIGHTS
+    return CastResult(lines=lines, codes=codes, masks=masks)
@@ -0,0 +1,116 @@
+"""
+卦辞爻辞目录与预序列化的解卦结果
+
+目录从app/gua/data/interpretations.json加载一次,按文王卦序排列,
+每卦包含卦辞、六爻爻辞,乾坤两卦另有用九、用六.
+
+解卦结果只由(本卦编码, 变爻掩码)决定,共64*64种,
+按该键缓存序列化好的JSON字节,响应直接拼接字节返回,不再经过模型校验和序列化.
+"""
+
+from datetime import datetime
+from functools import cache, lru_cache
+from pathlib import Path
+
+import orjson
+from fastapi import Response
+
+from app.gua.tables import HEXAGRAMS, reading_for
+
+
+DATA_FILE = Path(__file__).parent / "data" / "interpretations.json"
+
+
+@cache
+def load_catalogue() -> tuple[dict, ...]:
+    """
+    加载卦辞爻辞目录,进程内只读取一次
+
+    Returns:
+        tuple[dict, ...]: 按文王卦序排列的64卦辞条目
+    """
+    entries = orjson.loads(DATA_FILE.read_bytes())
+    if len(entries) != 64 or any(len(e["lines"]) != 6 for e in entries):
+        raise ValueError(f"卦辞目录不完整: {DATA_FILE}")
+    return tuple(sorted(entries, key=lambda e: e["number"]))
+
+
+def _entry(code: int) -> dict:
+    return load_catalogue()[HEXAGRAMS[code]["number"] - 1]
+
+
+def interpretation_for(code: int, mask: int) -> dict:
+    """
+    获取一次起卦对应的卦辞爻辞
+
+    六爻全变时,乾坤两卦取用九、用六,其余卦取变卦卦辞.
+
+    Args:
+        code: 本卦编码
+        mask: 变爻掩码
+
+    Returns:
+        dict: judgement为本卦卦辞,lines为本卦六爻爻辞,
+            changing为变爻爻辞,changed_judgement为变卦卦辞,无变爻时为None
+    """
+    entry = _entry(code)
+    changing = [entry["lines"][i] for i in range(6) if mask >> i & 1]
+    if mask == 0b111111 and "all_changing" in entry:
+        changing = [entry["all_changing"]]
+    return {
+        "judgement": entry["judgement"],
+        "lines": entry["lines"],
+        "changing": changing,
+        "changed_judgement": _entry(code ^ mask)["judgement"] if mask else None,
+    }
+
+
+def _dumps(obj) -> bytes:
+    return orjson.dumps(obj)
+
+
+@lru_cache(maxsize=64 * 64)
+def reading_bytes(code: int, mask: int) -> bytes:
+    """
+    获取序列化好的完整解卦结果,按(本卦编码, 变爻掩码)缓存
+
+    Returns:
+        bytes: JSON对象,包含卦象结果和interpretation卦辞爻辞
+    """
+    return _dumps({
+        **reading_for(code, mask),
+        "interpretation": interpretation_for(code, mask),
+    })
+
+
+def record_bytes(record_id: int, created_at: datetime, code: int, mask: int) -> bytes:
+    """把起卦记录的ID和时间拼到缓存的解卦结果前面"""
+    head = _dumps({"id": record_id, "created_at": created_at})
+    return head[:-1] + b"," + reading_bytes(code, mask)[1:]
+
+
+def json_array(items) -> bytes:
+    """拼接多个已序列化的JSON字节为数组"""
+    return b"[" + b",".join(items) + b"]"
+
+
+def resp_bytes(data: bytes, message: str = "", code: int = 200) -> Response:
+    """
+    按RespMod的结构拼接响应,data为已序列化的JSON字节
+
+    Returns:
+        Response: application/json响应
+    """
+    head = _dumps({"message": message, "code": code})
+    return Response(
+        content=head[:-1] + b',"data":' + data + b"}",
+        media_type="application/json",
+    )
+
+
+def warm_up() -> None:
+    """启动时加载目录并预先序列化全部64*64种解卦结果"""
+    load_catalogue()
+    for code in range(64):
+        for mask in range(64):
+            reading_bytes(code, mask)
@@ -0,0 +1,124 @@
+"""卦象预计算表。
+
+六爻用6位二进制编码: 第0位是初爻(最下),第5位是上爻,阳爻为1、阴爻为0。
+下卦是低3位,上卦是高3位。
+
+所有查表在模块导入时一次性算好,起卦时只做数组索引:
+    - HEXAGRAMS: 编码 → 卦的基本信息
+    - KING_WEN: 编码 → 文王卦序
+    - NUCLEAR: 编码 → 互卦编码
+    - READINGS: 本卦编码 × 64 + 变爻掩码 → 完整卦象结果
+"""
+
+import numpy as np
+
+# 八卦: 编码 → (卦名, 卦象, 自然象)
+TRIGRAMS: dict[int, tuple[str, str, str]] = {
+    0b111: ("乾", "☰", "天"),
+    0b011: ("兑", "☱", "泽"),
+    0b101: ("离", "☲", "火"),
+    0b001: ("震", "☳", "雷"),
+    0b110: ("巽", "☴", "风"),
+    0b010: ("坎", "☵", "水"),
+    0b100: ("艮", "☶", "山"),
+    0b000: ("坤", "☷", "地"),
+}
+
+# 文王六十四卦卦名,按卦序排列
+HEXAGRAM_NAMES: tuple[str, ...] = (
+    "乾", "坤", "屯", "蒙", "需", "讼", "师", "比",
+    "小畜", "履", "泰", "否", "同人", "大有", "谦", "豫",
+    "随", "蛊", "临", "观", "噬嗑", "贲", "剥", "复",
+    "无妄", "大畜", "颐", "大过", "坎", "离", "咸", "恒",
+    "遁", "大壮", "晋", "明夷", "家人", "睽", "蹇", "解",
+    "损", "益", "夬", "姤", "萃", "升", "困", "井",
+    "革", "鼎", "震", "艮", "渐", "归妹", "丰", "旅",
+    "巽", "兑", "涣", "节", "中孚", "小过", "既济", "未济",
+)
+
+# 文王卦序查找表: 行为下卦,列为上卦,顺序为 乾 震 坎 艮 坤 巽 离 兑
+_TABLE_ORDER = (0b111, 0b001, 0b010, 0b100, 0b000, 0b110, 0b101, 0b011)
+_KING_WEN_TABLE = (
+    (1, 34, 5, 26, 11, 9, 14, 43),
+    (25, 51, 3, 27, 24, 42, 21, 17),
+    (6, 40, 29, 4, 7, 59, 64, 47),
+    (33, 62, 39, 52, 15, 53, 56, 31),
+    (12, 16, 8, 23, 2, 20, 35, 45),
+    (44, 32, 48, 18, 46, 57, 50, 28),
+    (13, 55, 63, 22, 36, 37, 30, 49),
+    (10, 54, 60, 41, 19, 61, 38, 58),
+)
+
+
+def _build_king_wen() -> np.ndarray:
+    table = np.zeros(64, dtype=np.int8)
+    for row, lower in enumerate(_TABLE_ORDER):
+        for col, upper in enumerate(_TABLE_ORDER):
+            table[lower | upper << 3] = _KING_WEN_TABLE[row][col]
+    assert sorted(table.tolist()) == list(range(1, 65))
+    return table
+
+
+def _build_nuclear() -> np.ndarray:
+    # 互卦: 二三四爻为下卦,三四五爻为上卦
+    codes = np.arange(64)
+    return (((codes >> 1) & 0b111) | (((codes >> 2) & 0b111) << 3)).astype(np.int8)
+
+
+KING_WEN = _build_king_wen()
+NUCLEAR = _build_nuclear()
+
+
+def _hexagram_info(code: int) -> dict:
+    number = int(KING_WEN[code])
+    return {
+        "code": code,
+        "number": number,
+        "name": HEXAGRAM_NAMES[number - 1],
+        "symbol": chr(0x4DC0 + number - 1),
+        "upper": TRIGRAMS[code >> 3][0],
+        "lower": TRIGRAMS[code & 0b111][0],
+    }
+
+
+HEXAGRAMS: tuple[dict, ...] = tuple(_hexagram_info(code) for code in range(64))
+
+
+def _line_values(code: int, mask: int) -> list[int]:
+    # 老阴6、少阳7、少阴8、老阳9
+    values = []
+    for i in range(6):
+        yang = code >> i & 1
+        changing = mask >> i & 1
+        values.append((9 if changing else 7) if yang else (6 if changing else 8))
+    return values
+
+
+def _reading(code: int, mask: int) -> dict:
+    return {
+        "lines": _line_values(code, mask),
+        "changing_lines": [i + 1 for i in range(6) if mask >> i & 1],
+        "changing_mask": mask,
+        "hexagram": HEXAGRAMS[code],
+        "changed": HEXAGRAMS[code ^ mask] if mask else None,
+        "nuclear": HEXAGRAMS[int(NUCLEAR[code])],
+    }
+
+
+READINGS: tuple[dict, ...] = tuple(
+    _reading(code, mask) for code in range(64) for mask in range(64)
+)
+
+
+def reading_for(code: int, mask: int) -> dict:
+    """
+    查表获取完整卦象结果
+
+    Args:
+        code: 本卦编码
+        mask: 变爻掩码
+
+    Returns:
+        dict: 预计算的卦象结果,调用方不得修改
+    """
+    return READINGS[code << 6 | mask]
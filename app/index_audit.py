@@ -0,0 +1,493 @@
+"""索引审计脚本。
+
+对照模型声明(SQLModel.metadata)和线上库的统计信息,找出四类值得处理的索引:
+
+- redundant: 索引列是主键或另一个索引的前缀,查询总能走更宽的那个索引,只增加写放大
+- unused: pg_stat_user_indexes 中 idx_scan 为 0,且不承担唯一约束
+- oversized: 体积超过表本身一定比例的索引,或实测键值过宽的无长度限制文本列唯一索引。
+  PostgreSQL B树单个索引项上限约2.7KB,长文本列上的唯一索引还会让超长内容直接写入失败;
+  手机号、用户名这类短文本列虽然类型上没有长度限制,索引并不大,不报告
+- invalid: CREATE INDEX CONCURRENTLY 中断后留下的无效索引,不参与查询但仍随写入维护
+
+只连接模型时(--metadata-only)只检查模型声明;连接PostgreSQL时另外读取 pg_stat_user_indexes、
+pg_relation_size,并报告库里存在但模型没有声明的索引。
+
+--write-migration 按审计结果生成Alembic迁移: 冗余索引直接删除,文本列上的唯一索引
+按 --md5 指定换成 md5(列) 表达式唯一索引,无效索引删除后按原定义重建(模型未声明的只删除),
+全部使用 CONCURRENTLY,不阻塞线上读写。
+未使用的索引默认只报告,统计可能在最近一次 pg_stat_reset 后才开始累积,加 --drop-unused 才写入迁移。
+
+用法:
+    python -m app.index_audit                        # 审计当前 DATABASE_URL 指向的库
+    python -m app.index_audit --metadata-only        # 只检查模型声明
+    python -m app.index_audit --write-migration --md5 todo.text -m "drop redundant indexes"
+"""
+
+import argparse
+import logging
+import re
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import CHAR, Column, Engine, MetaData, String, Table, text
+from sqlmodel import SQLModel
+
+import app.models.table  # noqa: F401 注册全部表到 SQLModel.metadata
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+VERSIONS_DIR = Path(__file__).resolve().parent / "alembic" / "versions"
+# 索引体积超过表体积的该比例时报告为过大
+OVERSIZED_RATIO = 0.5
+# 小于该体积的未使用索引不值得处理
+MIN_INDEX_BYTES = 8 * 1024 * 1024
+# 文本列唯一索引的键平均宽度(pg_stats.avg_width)超过该字节数时报告为过大
+WIDE_KEY_BYTES = 256
+
+
+@dataclass
+class IndexInfo:
+    """审计用的索引描述,来自模型声明或 pg_index"""
+    table: str
+    name: str
+    columns: tuple[str, ...]
+    unique: bool = False
+    primary: bool = False
+    # 部分索引的 WHERE 条件或表达式索引,不能简单按列前缀判断覆盖关系
+    where: str | None = None
+    expression: bool = False
+    idx_scan: int | None = None
+    index_bytes: int | None = None
+    table_bytes: int | None = None
+    # 索引列的平均宽度之和,来自 pg_stats,未 ANALYZE 时为 None
+    key_width: int | None = None
+    invalid: bool = False
+    # pg_get_indexdef 给出的完整定义,重建表达式索引和无效索引时使用
+    definition: str | None = None
+
+
+@dataclass
+class Finding:
+    kind: str
+    index: IndexInfo
+    detail: str
+    # drop: 直接删除; md5: 换成 md5 表达式唯一索引; rebuild: 删除后按原定义重建; None: 只报告
+    action: str | None = None
+    sources: set[str] = field(default_factory=set)
+
+
+def _is_plain(index: IndexInfo) -> bool:
+    return index.where is None and not index.expression
+
+
+def _covered_by(index: IndexInfo, other: IndexInfo) -> bool:
+    """index 的列是否是 other 的前缀,other 能替代 index 的全部查询和约束"""
+    if other is index or other.invalid or not _is_plain(index) or not _is_plain(other):
+        return False
+    if other.columns[:len(index.columns)] != index.columns:
+        return False
+    if index.unique:
+        # 唯一索引只能被列完全相同的唯一索引或主键替代
+        return other.unique and other.columns == index.columns
+    if other.columns == index.columns and not other.primary and other.name < index.name:
+        # 两个完全相同的普通索引只删其中一个
+        return False
+    return True
+
+
+def _unbounded_text(column: Column) -> bool:
+    # sqlmodel 的 AutoString 是 TypeDecorator,实际类型在 impl_instance 上;
+    # GUID 在非PostgreSQL库上以 CHAR 实现,不算文本列
+    type_ = getattr(column.type, "impl_instance", column.type)
+    return isinstance(type_, String) and not isinstance(type_, CHAR) and type_.length is None
+
+
+def metadata_indexes(metadata: MetaData) -> list[IndexInfo]:
+    """把模型声明的主键和索引转换为 IndexInfo"""
+    indexes = []
+    for table in metadata.sorted_tables:
+        pk = tuple(column.name for column in table.primary_key.columns)
+        if pk:
+            indexes.append(IndexInfo(table.name, f"{table.name}_pkey", pk, unique=True, primary=True))
+        for index in table.indexes:
+            where = index.dialect_options["postgresql"].get("where")
+            indexes.append(IndexInfo(
+                table.name,
+                index.name,
+                tuple(expr.name for expr in index.expressions if isinstance(expr, Column)),
+                unique=bool(index.unique),
+                where=str(where) if where is not None else None,
+                expression=any(not isinstance(expr, Column) for expr in index.expressions),
+            ))
+    return indexes
+
+
+def database_indexes(engine: Engine) -> list[IndexInfo]:
+    """从 pg_index 和 pg_stat_user_indexes 读取索引定义、扫描次数和体积,包括无效索引"""
+    query = text("""
+        SELECT s.relname AS table_name,
+               s.indexrelname AS index_name,
+               i.indisunique, i.indisprimary,
+               NOT i.indisvalid AS invalid,
+               pg_get_indexdef(i.indexrelid) AS definition,
+               pg_get_expr(i.indpred, i.indrelid) AS predicate,
+               i.indexprs IS NOT NULL AS expression,
+               ARRAY(
+                   SELECT a.attname
+                   FROM unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord)
+                   JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+                   ORDER BY k.ord
+               ) AS columns,
+               (
+                   SELECT SUM(st.avg_width)
+                   FROM unnest(i.indkey) AS k(attnum)
+                   JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+                   JOIN pg_stats st ON st.schemaname = s.schemaname
+                       AND st.tablename = s.relname AND st.attname = a.attname
+               ) AS key_width,
+               s.idx_scan,
+               pg_relation_size(s.indexrelid) AS index_bytes,
+               pg_relation_size(s.relid) AS table_bytes
+        FROM pg_stat_user_indexes s
+        JOIN pg_index i ON i.indexrelid = s.indexrelid
+        WHERE s.schemaname = current_schema()
+        ORDER BY s.relname, s.indexrelname
+    """)
+    with engine.connect() as conn:
+        return [
+            IndexInfo(
+                row.table_name, row.index_name, tuple(row.columns),
+                unique=row.indisunique, primary=row.indisprimary,
+                where=row.predicate, expression=row.expression,
+                idx_scan=row.idx_scan, index_bytes=row.index_bytes, table_bytes=row.table_bytes,
+                key_width=row.key_width, invalid=row.invalid, definition=row.definition,
+            )
+            for row in conn.execute(query)
+        ]
+
+
+def stats_since(engine: Engine) -> datetime | None:
+    """统计信息的累积起点,idx_scan 只统计这之后的扫描"""
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()"
+        )).scalar()
+
+
+def _too_large(index: IndexInfo, min_bytes: int, oversized_ratio: float) -> bool:
+    return bool(index.index_bytes and index.table_bytes
+                and index.index_bytes >= min_bytes
+                and index.index_bytes > index.table_bytes * oversized_ratio)
+
+
+def audit(indexes: list[IndexInfo], metadata: MetaData, source: str,
+          min_bytes: int = MIN_INDEX_BYTES, oversized_ratio: float = OVERSIZED_RATIO,
+          md5_columns: frozenset[str] = frozenset(),
+          wide_key_bytes: int = WIDE_KEY_BYTES) -> list[Finding]:
+    """
+    审计一组索引
+
+    无长度限制文本列上的唯一索引只在实测体积或键宽度超限,或列由 --md5 指定时报告;
+    只读模型声明时没有实测数据,这类索引只在 --md5 指定时报告。
+
+    Args:
+        indexes: 同一来源的全部索引
+        metadata: 模型元数据,用于判断列类型
+        source: metadata 或 database
+        md5_columns: 允许换成 md5 表达式唯一索引的列,格式为 表名.列名
+        min_bytes: 未使用索引的最小报告体积
+        oversized_ratio: 索引体积超过表体积该比例时报告为过大
+        wide_key_bytes: 文本列唯一索引的键平均宽度超过该字节数时报告为过大
+
+    Returns:
+        list[Finding]: 审计结果
+    """
+    findings = []
+    by_table: dict[str, list[IndexInfo]] = {}
+    for index in indexes:
+        by_table.setdefault(index.table, []).append(index)
+
+    for table_name, table_indexes in by_table.items():
+        table: Table | None = metadata.tables.get(table_name)
+        for index in table_indexes:
+            if index.primary:
+                continue
+            if index.invalid:
+                declared = table is not None and any(i.name == index.name for i in table.indexes)
+                findings.append(Finding(
+                    "invalid", index, "CONCURRENTLY 建索引中断留下的无效索引",
+                    "rebuild" if declared else "drop", {source}))
+                continue
+            wider = next((other for other in table_indexes if _covered_by(index, other)), None)
+            if wider is not None:
+                findings.append(Finding(
+                    "redundant", index, f"被 {wider.name}({', '.join(wider.columns)}) 覆盖", "drop", {source}))
+                continue
+
+            columns = [table.columns[name] for name in index.columns
+                       if table is not None and name in table.columns]
+            if (index.unique and _is_plain(index) and len(columns) == 1
+                    and _unbounded_text(columns[0])):
+                replace = f"{table_name}.{columns[0].name}" in md5_columns
+                if _too_large(index, min_bytes, oversized_ratio):
+                    measured = f"索引 {index.index_bytes / 2**20:.1f}MB, 表 {index.table_bytes / 2**20:.1f}MB"
+                elif index.key_width is not None and index.key_width > wide_key_bytes:
+                    measured = f"键平均宽度 {index.key_width} 字节"
+                elif replace:
+                    measured = "由 --md5 指定"
+                else:
+                    measured = None
+                if measured is not None:
+                    findings.append(Finding(
+                        "oversized", index,
+                        f"{measured}, 文本列 {columns[0].name} 无长度限制,可改为 md5({columns[0].name})",
+                        "md5" if replace else None, {source}))
+            elif _too_large(index, min_bytes, oversized_ratio):
+                findings.append(Finding(
+                    "oversized", index,
+                    f"索引 {index.index_bytes / 2**20:.1f}MB, 表 {index.table_bytes / 2**20:.1f}MB",
+                    None, {source}))
+
+            if (index.idx_scan == 0 and not index.unique
+                    and (index.index_bytes or 0) >= min_bytes):
+                findings.append(Finding(
+                    "unused", index, f"idx_scan=0, {index.index_bytes / 2**20:.1f}MB", "drop", {source}))
+    return findings
+
+
+def undeclared(db_indexes: list[IndexInfo], model_indexes: list[IndexInfo]) -> list[Finding]:
+    """库里存在但模型没有声明的索引,通常是迁移与模型不同步"""
+    declared = {(index.table, index.name) for index in model_indexes}
+    return [
+        Finding("undeclared", index, "模型中没有声明", None, {"database"})
+        for index in db_indexes
+        if not index.primary and (index.table, index.name) not in declared
+    ]
+
+
+def merge(findings: list[Finding]) -> list[Finding]:
+    """同一索引同一类问题只保留一条,合并来源"""
+    merged: dict[tuple[str, str, str], Finding] = {}
+    for finding in findings:
+        key = (finding.index.table, finding.index.name, finding.kind)
+        if key in merged:
+            merged[key].sources |= finding.sources
+            if finding.index.idx_scan is not None:
+                merged[key].index = finding.index
+        else:
+            merged[key] = finding
+    return list(merged.values())
+
+
+def print_report(findings: list[Finding], since: datetime | None) -> None:
+    if since is not None:
+        print(f"统计起点: {since:%Y-%m-%d %H:%M:%S}")
+    if not findings:
+        print("没有发现需要处理的索引")
+        return
+    print(f"{'kind':<12}{'table':<16}{'index':<36}{'scans':>10}{'size MB':>10}  detail")
+    for finding in sorted(findings, key=lambda f: (f.kind, f.index.table, f.index.name)):
+        index = finding.index
+        scans = "-" if index.idx_scan is None else str(index.idx_scan)
+        size = "-" if index.index_bytes is None else f"{index.index_bytes / 2**20:.1f}"
+        print(f"{finding.kind:<12}{index.table:<16}{index.name:<36}{scans:>10}{size:>10}  {finding.detail}")
+
+
+def _concurrent_definition(definition: str) -> str:
+    """把 pg_get_indexdef 的结果改写为 CREATE INDEX CONCURRENTLY IF NOT EXISTS"""
+    return re.sub(r"^CREATE (UNIQUE )?INDEX ", r"CREATE \1INDEX CONCURRENTLY IF NOT EXISTS ", definition)
+
+
+def _create_index_call(index: IndexInfo, indent: str) -> str:
+    if index.expression and index.definition:
+        # 表达式索引没有列名可用,按库中的原定义重建
+        return f"{indent}op.execute({_concurrent_definition(index.definition)!r})"
+    lines = [
+        f"{indent}op.create_index(",
+        f"{indent}    {index.name!r},",
+        f"{indent}    {index.table!r},",
+        f"{indent}    {list(index.columns)!r},",
+        f"{indent}    unique={index.unique},",
+    ]
+    if index.where:
+        lines.append(f"{indent}    postgresql_where=sa.text({index.where!r}),")
+    lines += [
+        f"{indent}    postgresql_concurrently=True,",
+        f"{indent}    if_not_exists=True,",
+        f"{indent})",
+    ]
+    return "\n".join(lines)
+
+
+def _create_md5_index_call(name: str, index: IndexInfo, indent: str) -> str:
+    return "\n".join([
+        f"{indent}op.create_index(",
+        f"{indent}    {name!r},",
+        f"{indent}    {index.table!r},",
+        f"{indent}    [sa.text('md5({index.columns[0]})')],",
+        f"{indent}    unique=True,",
+        f"{indent}    postgresql_concurrently=True,",
+        f"{indent}    if_not_exists=True,",
+        f"{indent})",
+    ])
+
+
+def _drop_index_call(name: str, table: str, indent: str) -> str:
+    return "\n".join([
+        f"{indent}op.drop_index(",
+        f"{indent}    {name!r},",
+        f"{indent}    table_name={table!r},",
+        f"{indent}    postgresql_concurrently=True,",
+        f"{indent}    if_exists=True,",
+        f"{indent})",
+    ])
+
+
+def _recreate_index_calls(name: str, table: str, create: str, indent: str) -> list[str]:
+    # 上次迁移中断可能留下同名的无效索引,IF NOT EXISTS 会直接跳过它,先删再建
+    return [_drop_index_call(name, table, indent), create]
+
+
+def md5_index_name(index: IndexInfo) -> str:
+    return f"ux_{index.table}_{index.columns[0]}_md5"
+
+
+def render_migration(findings: list[Finding], message: str, revision: str,
+                     down_revision: str | None) -> str:
+    """
+    按审计结果生成迁移脚本
+
+    升级时先重建无效索引、建替代索引,再删旧索引,保证唯一约束不出现空窗;
+    降级按相反顺序恢复,无效索引不恢复。每次建索引前先删除同名索引,避免沿用中断留下的无效索引。
+
+    Args:
+        findings: 带 action 的审计结果
+        message: 迁移说明
+        revision: 新迁移的版本号
+        down_revision: 上一个版本号
+
+    Returns:
+        str: 迁移脚本内容
+    """
+    indent = " " * 8
+    rebuilds, creates, drops, restores, removes = [], [], [], [], []
+    for finding in findings:
+        index = finding.index
+        if finding.kind == "invalid":
+            if finding.action == "rebuild":
+                rebuilds += _recreate_index_calls(
+                    index.name, index.table, _create_index_call(index, indent), indent)
+            else:
+                rebuilds.append(_drop_index_call(index.name, index.table, indent))
+            continue
+        if finding.action == "md5":
+            name = md5_index_name(index)
+            creates += _recreate_index_calls(
+                name, index.table, _create_md5_index_call(name, index, indent), indent)
+            removes.append(_drop_index_call(name, index.table, indent))
+        drops.append(_drop_index_call(index.name, index.table, indent))
+        restores += _recreate_index_calls(
+            index.name, index.table, _create_index_call(index, indent), indent)
+
+    downgrade = "    pass"
+    if restores or removes:
+        downgrade = "    with op.get_context().autocommit_block():\n" + "\n".join(restores + removes)
+    comments = "\n".join(f"    # {f.index.name}: {f.kind}, {f.detail}" for f in findings)
+    return f'''"""{message}
+
+Revision ID: {revision}
+Revises: {down_revision or ''}
+Create Date: {datetime.now()}
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = {revision!r}
+down_revision = {down_revision!r}
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+{comments}
+    # CREATE/DROP INDEX CONCURRENTLY 不能在事务中执行，且不锁写入
+    with op.get_context().autocommit_block():
+{chr(10).join(rebuilds + creates + drops)}
+
+
+def downgrade():
+{downgrade}
+'''
+
+
+def write_migration(findings: list[Finding], message: str) -> Path:
+    """在 app/alembic/versions 下生成迁移文件,down_revision 取当前head"""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    script = ScriptDirectory.from_config(Config(str(ALEMBIC_INI)))
+    revision = uuid.uuid4().hex[-12:]
+    slug = re.sub(r"\W+", "_", message.lower()).strip("_")[:40]
+    path = VERSIONS_DIR / f"{revision}_{slug}.py"
+    path.write_text(render_migration(findings, message, revision, script.get_current_head()),
+                    encoding="utf-8")
+    return path
+
+
+def main() -> None:
+    """主函数入口。"""
+    parser = argparse.ArgumentParser(description="索引审计")
+    parser.add_argument("--metadata-only", action="store_true", help="只检查模型声明,不连接数据库")
+    parser.add_argument("--min-size-mb", type=float, default=MIN_INDEX_BYTES / 2**20,
+                        help="未使用索引的最小报告体积")
+    parser.add_argument("--oversized-ratio", type=float, default=OVERSIZED_RATIO)
+    parser.add_argument("--wide-key-bytes", type=int, default=WIDE_KEY_BYTES,
+                        help="文本列唯一索引的键平均宽度超过该字节数时报告为过大")
+    parser.add_argument("--write-migration", action="store_true", help="按审计结果生成Alembic迁移")
+    parser.add_argument("--drop-unused", action="store_true", help="迁移中同时删除未使用的索引")
+    parser.add_argument("--md5", action="append", default=[], metavar="TABLE.COLUMN",
+                        help="把该列上的唯一索引换成 md5 表达式唯一索引,可重复指定。"
+                             "替换后 WHERE 列 = 值 的查询不能再走该索引,只用于只靠索引保证唯一的列")
+    parser.add_argument("-m", "--message", default="drop redundant indexes")
+    args = parser.parse_args()
+
+    min_bytes = int(args.min_size_mb * 2**20)
+    model_indexes = metadata_indexes(SQLModel.metadata)
+    md5_columns = frozenset(args.md5)
+    findings = audit(model_indexes, SQLModel.metadata, "metadata", min_bytes, args.oversized_ratio,
+                     md5_columns, args.wide_key_bytes)
+    since = None
+    if not args.metadata_only:
+        from app.core.db import engine
+
+        if engine.dialect.name != "postgresql":
+            parser.error(f"数据库统计只支持PostgreSQL,当前为 {engine.dialect.name},可加 --metadata-only")
+        db_indexes = database_indexes(engine)
+        since = stats_since(engine)
+        findings += audit(db_indexes, SQLModel.metadata, "database", min_bytes, args.oversized_ratio,
+                          md5_columns, args.wide_key_bytes)
+        findings += undeclared(db_indexes, model_indexes)
+    findings = merge(findings)
+    print_report(findings, since)
+
+    if args.write_migration:
+        actions = {"drop", "md5", "rebuild"}
+        selected = [f for f in findings
+                    if f.action in actions and (f.kind != "unused" or args.drop_unused)]
+        if not selected:
+            logger.info("没有需要写入迁移的索引")
+            return
+        path = write_migration(selected, args.message)
+        logger.info(f"✅ 已生成迁移 {path.relative_to(ALEMBIC_INI.parent)}")
+
+
+if __name__ == "__main__":
+    main()
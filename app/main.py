@@ -14,10 +14,18 @@
 import logging
 from contextlib import asynccontextmanager
 from sqlalchemy.exc import SQLAlchemyError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from app.models.public_models.Out import ErrorMod
 from .api.main import api_router
+from app.api.responses import AppJSONResponse
+from app.core.background import start_background_tasks, stop_background_tasks
 from app.core.config import settings
+from app.core.db import async_engine, engine
+from app.core.metrics import MetricsMiddleware, instrument_engine, mark_worker_dead, render_metrics
+from app.core import query_budget
+from app.core.ratelimit import close_rate_limit_store
+from app.core.security import shutdown_hash_executor
+from app.gua.interpretations import warm_up as warm_up_gua
 from fastapi import FastAPI, Request
 
 # 配置日志
@@ -36,7 +44,7 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """管理应用生命周期。
 
-    记录启动和关闭事件的关键信息。
+    记录启动和关闭事件的关键信息，启动和停止后台任务。
 
     参数:
         app: FastAPI应用实例
@@ -60,8 +68,24 @@ async def lifespan(app: FastAPI):
     logger.info(f"🔗 API路径: {settings.API_V1_STR}")
     logger.info("✅ —————————————————— 程序启动")
 
+    # 加载卦辞目录并预先序列化解卦结果
+    warm_up_gua()
+
+    start_background_tasks()
+
     yield
 
+    await stop_background_tasks()
+
+    # 关闭限流使用的Redis连接
+    await close_rate_limit_store()
+
+    # 释放bcrypt哈希进程池
+    shutdown_hash_executor()
+
+    # 清理当前worker的进行中请求数指标
+    mark_worker_dead()
+
     # 关闭日志
     logger.info("👋 —————————————————— 程序关闭")
 
@@ -74,11 +98,31 @@ app = FastAPI(
     docs_url=None if settings.ENVIRONMENT == "production" else "/docs",
     redoc_url=None,
     lifespan=lifespan,
+    # orjson序列化,支持直接返回SQLModel对象
+    default_response_class=AppJSONResponse,
 )
 
 # 注册API路由，api router 是所有路由的集合，可分组
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# 开发和暂存环境检测超出查询预算的请求和N+1
+if query_budget.budget_mode() != "off":
+    app.add_middleware(query_budget.QueryBudgetMiddleware)
+    query_budget.instrument_engine(engine)
+    query_budget.instrument_engine(async_engine.sync_engine)
+
+# 请求耗时、状态码和每个请求的SQL条数指标
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    """Prometheus指标，多worker时汇总所有worker"""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
 
 @app.exception_handler(ErrorMod)
 async def error_mod_exception_handler(request: Request, exc: ErrorMod):
@@ -112,3 +156,18 @@ async def database_exception_handler(request: Request, exc: SQLAlchemyError):
     """
     logger.error(f"Database error for URL {request.url}: {exc}")
     return JSONResponse(status_code=500, content={"message": "Service temporarily unavailable. Please try again later."})
+
+
+@app.exception_handler(query_budget.QueryBudgetExceeded)
+async def query_budget_exception_handler(request: Request, exc: query_budget.QueryBudgetExceeded):
+    """处理超出查询预算的请求,仅在 QUERY_BUDGET_MODE=raise 时出现。
+
+    参数:
+        request: 触发异常的请求
+        exc: QueryBudgetExceeded异常实例
+
+    返回:
+        包含问题描述的500响应
+    """
+    logger.error(f"Query budget exceeded for URL {request.url}: {exc.message}")
+    return JSONResponse(status_code=500, content={"message": exc.message, "code": 500})
@@ -1,7 +1,8 @@
 from datetime import datetime
 from datetime import timezone
-from uuid import UUID, uuid4
+from uuid import UUID
 from sqlmodel import SQLModel, Field
+from app.tool.uuid7 import uuid7
 
 
 class TableBase(SQLModel):
@@ -9,7 +10,7 @@ class TableBase(SQLModel):
     数据库表的基类,提供了所有表共用的基础字段和功能。
 
     该基类实现了以下核心功能:
-    1. 自动生成UUID主键
+    1. 自动生成按时间排序的UUIDv7主键
     2. 自动记录创建和更新时间(UTC时间)
     3. 支持软删除
     4. 支持描述字段
@@ -18,6 +19,7 @@ class TableBase(SQLModel):
     - 使用SQLModel作为ORM基类,结合了SQLAlchemy的强大功能和Pydantic的类型检查
     - 所有时间字段使用UTC时间,避免时区问题
     - UUID主键提供了更好的分布式系统支持
+    - UUIDv7按生成时间递增,新记录追加在主键索引末尾,写入局部性与自增主键相近
     - 软删除支持数据追踪和恢复
 
     使用建议:
@@ -28,11 +30,10 @@ class TableBase(SQLModel):
 
     #用户唯一标识
     id: UUID = Field(
-        default_factory=uuid4,
+        default_factory=uuid7,
         primary_key=True,
-        index=True,
         nullable=False,
-        description="表主键,使用UUID4自动生成"
+        description="表主键,使用UUIDv7自动生成"
     )
 
     created_at: datetime = Field(
@@ -0,0 +1,45 @@
+
+
+from datetime import datetime, timezone
+from sqlalchemy import BigInteger, Integer, SmallInteger
+from sqlmodel import Field, SQLModel
+
+
+class GuaReadingBase(SQLModel):
+    """起卦记录基础模型
+
+    起卦记录只追加不修改,数量远大于其他表,因此不继承TableBase,
+    只保存还原卦象所需的最少字段:
+    - hexagram_code: 本卦6位编码(0~63),见 app.gua.tables
+    - changing_mask: 变爻掩码(0~63)
+    - created_at: 起卦时间
+
+    爻值、变卦、互卦都能由编码和掩码查表还原,无需存储。
+    """
+    id: int | None = Field(
+        default=None,
+        primary_key=True,
+        # SQLite只有INTEGER主键才会自增,本地替身数据库使用INTEGER
+        sa_type=BigInteger().with_variant(Integer, "sqlite"),
+        description="自增主键,比UUID更紧凑"
+    )
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        description="起卦时间(UTC)"
+    )
+    hexagram_code: int = Field(
+        ge=0,
+        le=63,
+        sa_type=SmallInteger,
+        nullable=False,
+        description="本卦编码,初爻为最低位,阳爻为1"
+    )
+    changing_mask: int = Field(
+        default=0,
+        ge=0,
+        le=63,
+        sa_type=SmallInteger,
+        nullable=False,
+        description="变爻掩码,第i位为1表示第i+1爻为变爻"
+    )
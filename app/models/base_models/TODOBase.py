@@ -42,10 +42,9 @@ class TODOBase(TableBase):
     # - unique: 是否唯一
     # - index: 是否创建索引
     # - description: 字段描述
+    # 唯一性由 table.py 中的 ux_todo_text_md5 表达式索引保证
     text: str = Field(
         nullable=False,
-        unique=True,
-        index=True,
         description="TODO内容"
     )
 
@@ -1,5 +1,36 @@
-from sqlmodel import SQLModel
+from uuid import UUID
+from pydantic import field_validator
+from sqlmodel import Field, SQLModel
 
 
 class PhoneNumberIn(SQLModel):
     phone_number: str
+
+
+# 批量TODO接口单次最多处理的条数
+TODO_BATCH_MAX_ITEMS = 100
+
+
+class TodoBatchAddIn(SQLModel):
+    texts: list[str] = Field(min_length=1, max_length=TODO_BATCH_MAX_ITEMS)
+
+
+class TodoStatusIn(SQLModel):
+    todo_id: UUID
+    completed: bool
+
+
+class TodoBatchCompleteIn(SQLModel):
+    items: list[TodoStatusIn] = Field(min_length=1, max_length=TODO_BATCH_MAX_ITEMS)
+
+    @field_validator("items")
+    @classmethod
+    def unique_todo_ids(cls, items: list[TodoStatusIn]) -> list[TodoStatusIn]:
+        # 同一批中重复的ID在一条UPDATE里只会按其中一个状态生效,结果不确定,直接拒绝
+        if len({item.todo_id for item in items}) != len(items):
+            raise ValueError("todo_id 不能重复")
+        return items
+
+
+class TodoBatchDeleteIn(SQLModel):
+    todo_ids: list[UUID] = Field(min_length=1, max_length=TODO_BATCH_MAX_ITEMS)
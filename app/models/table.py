@@ -3,10 +3,12 @@
 
 
 from uuid import UUID
+from sqlalchemy import Column, DateTime, Index, Table, func
 from sqlmodel import Field, Relationship, SQLModel
 from app.models.base_models.TODOBase import TODOBase
 from app.models.base_models.SMSCodeRecordBase import SMSCodeRecordBase
 from app.models.base_models.UserBase import UserBase
+from app.models.base_models.GuaReadingBase import GuaReadingBase
 
 
 # 用户表
@@ -15,14 +17,115 @@ class User(UserBase, table=True):
     todos: list["TODO"] = Relationship(back_populates="user")
 
 
+# 归档任务按删除时间挑选待归档用户
+Index(
+    "ix_user_updated_at_deleted",
+    User.updated_at,
+    postgresql_where=User.is_deleted == True,
+)
+
+
 # 短信发送记录
 class SMSCodeRecord(SMSCodeRecordBase, table=True):
     pass
 
 
+# 按手机号查最新验证码，索引顺序与 ORDER BY created_at DESC 一致
+Index(
+    "ix_smscoderecord_phone_number_created_at",
+    SMSCodeRecord.phone_number,
+    SMSCodeRecord.created_at.desc(),
+)
+
+
 # TODO表格
 # None表示该字段可以为空，此处不可为空，不为空比较安全
 #user的反向关系为todos
 class TODO(TODOBase, table=True):
     user_id: UUID = Field(foreign_key="user.id")
-    user: User = Relationship(back_populates="todos")
\ No newline at end of file
+    user: User = Relationship(back_populates="todos")
+
+
+# TODO分页列表，只索引未删除的记录
+Index(
+    "ix_todo_user_id_created_at_id",
+    TODO.user_id,
+    TODO.created_at,
+    TODO.id,
+    postgresql_where=TODO.is_deleted == False,
+)
+
+
+# 已完成/未完成列表，只索引未删除的记录
+Index(
+    "ix_todo_user_id_completed",
+    TODO.user_id,
+    TODO.completed,
+    postgresql_where=TODO.is_deleted == False,
+)
+
+
+# 归档任务按删除时间挑选待归档记录，已删除记录很少，部分索引很小
+Index(
+    "ix_todo_updated_at_deleted",
+    TODO.updated_at,
+    postgresql_where=TODO.is_deleted == True,
+)
+
+
+# 增量同步按 (updated_at, id) 读取变更，包含已删除的记录，因此不是部分索引；
+# 删除(归档)用户时 PostgreSQL 的外键检查也按 user_id 前缀走这个索引
+Index(
+    "ix_todo_user_id_updated_at_id",
+    TODO.user_id,
+    TODO.updated_at,
+    TODO.id,
+)
+
+
+# TODO内容唯一，只索引md5摘要
+# 内容长度不受限，直接建B树唯一索引时超过约2.7KB的内容无法写入，索引体积也随内容增长
+Index("ux_todo_text_md5", func.md5(TODO.text), unique=True)
+
+
+# 起卦记录
+# 不声明Relationship，历史查询只按user_id走索引，避免误触发懒加载
+class GuaReading(GuaReadingBase, table=True):
+    user_id: UUID = Field(foreign_key="user.id", nullable=False)
+
+
+# 按用户分页查询起卦历史
+Index(
+    "ix_guareading_user_id_created_at_id",
+    GuaReading.user_id,
+    GuaReading.created_at,
+    GuaReading.id,
+)
+
+
+def archive_table(source: Table) -> Table:
+    """按热表的列生成归档表
+
+    归档表只保留列和主键，不带外键、唯一约束和索引：
+    用户和TODO分别归档，外键会互相阻塞；同一手机号注销、重新注册后再次注销，
+    归档表里会有两条手机号相同的记录。
+    archived_at 记录归档时间。
+    """
+    columns = [
+        Column(column.name, column.type, nullable=column.nullable, primary_key=column.primary_key)
+        for column in source.columns
+    ]
+    return Table(
+        f"{source.name}_archive",
+        SQLModel.metadata,
+        *columns,
+        Column("archived_at", DateTime, nullable=False),
+    )
+
+
+# 软删除记录的冷存储，由 app.crud.ArchiveCRUD 搬运
+todo_archive = archive_table(TODO.__table__)
+user_archive = archive_table(User.__table__)
+
+# 恢复用户时一并恢复其TODO
+Index("ix_todo_archive_user_id", todo_archive.c.user_id)
@@ -0,0 +1,153 @@
+"""批量造数脚本。
+
+为压测和暂存环境生成大量 user、todo 和 smscoderecord 数据,用于复现生产规模下的查询计划。
+
+- PostgreSQL: 通过 psycopg 的 COPY 协议流式写入,行由生成器逐条产生,内存占用与总量无关
+- SQLite: 按批 executemany 写入
+
+用法:
+    python -m app.seed_data --users 100000 --todos 10000000 --sms 1000000
+    python -m app.seed_data --users 1000 --offset 100000  # 追加一批,手机号和内容不与上一批冲突
+"""
+
+import argparse
+import itertools
+import logging
+import random
+import time
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import Engine, insert, text
+from sqlmodel import SQLModel
+
+from app.core.db import engine as default_engine
+from app.models.table import TODO, SMSCodeRecord, User
+from app.tool.uuid7 import uuid7
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 10_000
+# 造数记录的创建时间分布在最近一年内
+SPAN_SECONDS = 365 * 24 * 3600
+
+USER_COLUMNS = ("id", "created_at", "updated_at", "is_deleted", "username",
+                "phone_number", "is_active", "is_superuser")
+TODO_COLUMNS = ("id", "created_at", "updated_at", "is_deleted", "text",
+                "completed", "user_id")
+SMS_COLUMNS = ("id", "created_at", "updated_at", "is_deleted", "phone_number",
+               "sms_code", "expire_time")
+
+
+def seed_phone(index: int) -> str:
+    """第index个造数用户的手机号"""
+    return f"199{index:08d}"
+
+
+def user_rows(user_ids: list[UUID], offset: int, now: datetime) -> Iterator[tuple]:
+    for i, user_id in enumerate(user_ids, start=offset):
+        created_at = now - timedelta(seconds=random.randrange(SPAN_SECONDS))
+        yield (user_id, created_at, created_at, False, f"seed{i}",
+               seed_phone(i), True, False)
+
+
+def todo_rows(count: int, user_ids: list[UUID], offset: int, now: datetime) -> Iterator[tuple]:
+    # 少数活跃用户拥有大部分TODO,近似生产中的长尾分布
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(user_ids))))
+    for start in range(0, count, BATCH_SIZE):
+        owners = random.choices(user_ids, cum_weights=cum_weights, k=min(BATCH_SIZE, count - start))
+        for i, user_id in enumerate(owners, start=offset + start):
+            created_at = now - timedelta(seconds=random.randrange(SPAN_SECONDS))
+            yield (uuid7(), created_at, created_at, random.random() < 0.05,
+                   f"seed-todo-{i}", random.random() < 0.4, user_id)
+
+
+def sms_rows(count: int, users: int, offset: int, now: datetime) -> Iterator[tuple]:
+    # 验证码过期时间与CRUD一致使用本地时间,造数记录均已过期
+    local_now = datetime.now()
+    for _ in range(count):
+        age = random.randrange(SPAN_SECONDS)
+        created_at = now - timedelta(seconds=age)
+        yield (uuid7(), created_at, created_at, False, seed_phone(offset + random.randrange(users)),
+               random.randint(1000, 9999), local_now - timedelta(seconds=age - 60))
+
+
+def copy_rows(engine: Engine, table: str, columns: tuple[str, ...], rows: Iterator[tuple]) -> None:
+    """通过COPY协议流式写入PostgreSQL"""
+    raw = engine.raw_connection()
+    try:
+        with raw.driver_connection.cursor() as cur:
+            with cur.copy(f'COPY "{table}" ({", ".join(columns)}) FROM STDIN') as copy:
+                for row in rows:
+                    copy.write_row(row)
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def insert_rows(engine: Engine, table, columns: tuple[str, ...], rows: Iterator[tuple]) -> None:
+    """按批executemany写入,用于SQLite等不支持COPY的数据库"""
+    with engine.begin() as conn:
+        while batch := list(itertools.islice(rows, BATCH_SIZE)):
+            conn.execute(insert(table), [dict(zip(columns, row)) for row in batch])
+
+
+def seed(users: int, todos: int, sms: int, offset: int = 0,
+         engine: Engine = default_engine) -> None:
+    """
+    生成造数数据
+
+    Args:
+        users: 用户数
+        todos: TODO数,按长尾分布分配给本批用户
+        sms: 验证码记录数
+        offset: 编号起点,追加造数时避免手机号、用户名和TODO内容冲突
+        engine: 目标数据库引擎
+    """
+    now = datetime.now(timezone.utc)
+    user_ids = [uuid7() for _ in range(users)]
+    use_copy = engine.dialect.name == "postgresql"
+    jobs = [
+        (User, USER_COLUMNS, user_rows(user_ids, offset, now), users),
+        (TODO, TODO_COLUMNS, todo_rows(todos, user_ids, offset, now), todos),
+        (SMSCodeRecord, SMS_COLUMNS, sms_rows(sms, users, offset, now), sms),
+    ]
+    for table, columns, rows, count in jobs:
+        if not count:
+            continue
+        started = time.perf_counter()
+        if use_copy:
+            copy_rows(engine, table.__tablename__, columns, rows)
+        else:
+            insert_rows(engine, table, columns, rows)
+        logger.info(f"🌱 {table.__tablename__}: {count} 行, {time.perf_counter() - started:.1f}s")
+    if use_copy:
+        with engine.begin() as conn:
+            for table, *_ in jobs:
+                conn.execute(text(f'ANALYZE "{table.__tablename__}"'))
+
+
+def main() -> None:
+    """主函数入口。"""
+    parser = argparse.ArgumentParser(description="批量造数")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--todos", type=int, default=100_000)
+    parser.add_argument("--sms", type=int, default=10_000)
+    parser.add_argument("--offset", type=int, default=0, help="编号起点,追加造数时使用")
+    parser.add_argument("--create-tables", action="store_true",
+                        help="先按模型建表,用于未执行迁移的一次性数据库")
+    args = parser.parse_args()
+
+    if args.users <= 0 and (args.todos or args.sms):
+        parser.error("生成TODO和验证码记录需要至少一个用户")
+    if args.create_tables:
+        SQLModel.metadata.create_all(default_engine)
+    logger.info("🚀 开始造数")
+    seed(args.users, args.todos, args.sms, args.offset)
+    logger.info("✅ 造数完成")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """进程内LRU + TTL缓存工具类
+
+    - 超过maxsize时淘汰最久未使用的条目
+    - 条目超过ttl秒后视为失效,单个条目可以指定更短的ttl
+    - 记录命中和未命中次数,便于观察缓存效果
+
+    每个uvicorn worker各自持有一份,不跨进程共享。
+    同步路由运行在线程池中,因此所有操作都加锁。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        """
+        获取缓存值
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            V | None: 命中返回缓存值,未命中或已过期返回None
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """
+        写入缓存值,超出容量时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 该条目的有效秒数,默认使用缓存的ttl,不会超过缓存的ttl
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        """
+        使指定缓存失效
+
+        Args:
+            key: 缓存键
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        获取缓存统计信息
+
+        Returns:
+            dict: 包含命中数、未命中数、命中率和当前容量
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,49 @@
+import base64
+from datetime import datetime
+from uuid import UUID
+
+
+class CursorTool:
+    """分页游标工具类
+
+    游标由 (时间戳, 记录ID) 组成,对客户端不透明。
+    时间戳相同时用记录ID打破平局,保证翻页时不重复、不遗漏。
+    """
+
+    @staticmethod
+    def encode(timestamp: datetime, record_id: UUID | int) -> str:
+        """
+        把 (时间戳, 记录ID) 编码为不透明的游标字符串
+
+        Args:
+            timestamp: 记录的时间戳
+            record_id: 记录ID
+
+        Returns:
+            str: URL安全的游标字符串
+        """
+        raw = f"{timestamp.isoformat()}|{record_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode(cursor: str, id_type: type = UUID) -> tuple[datetime, UUID | int]:
+        """
+        把游标字符串解码为 (时间戳, 记录ID)
+
+        Args:
+            cursor: encode() 生成的游标字符串
+            id_type: 记录ID的类型,UUID或int
+
+        Returns:
+            tuple[datetime, UUID | int]: 时间戳和记录ID
+
+        Raises:
+            ValueError: 游标格式不正确
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            timestamp, record_id = base64.urlsafe_b64decode(
+                padded.encode()).decode().split("|")
+            return datetime.fromisoformat(timestamp), id_type(record_id)
+        except Exception as e:
+            raise ValueError(f"无效的游标: {cursor}") from e
@@ -0,0 +1,180 @@
+"""
+CRUD查询计划检查
+
+在造数后的一次性数据库上调用 TodoCRUD、UserCRUD、SMSCodeRecordCRUD 的读方法,
+截获实际发出的SQL,逐条EXPLAIN,检查是否走了预期的索引.
+任一查询没有命中预期索引时以非零状态退出,可以在改动模型、查询或迁移后执行.
+
+用法:
+    python -m benchmarks.query_plans --database-url postgresql+psycopg://... --todos 1000000
+    python -m benchmarks.query_plans  # 临时SQLite文件,只检查索引是否可用
+
+--database-url 库中建的表默认保留,加 --drop 才在结束后删除。
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import event, func, text
+
+
+@dataclass
+class PlanCheck:
+    label: str
+    call: Callable[[dict], object]
+    # 命中其中任意一个索引即通过
+    indexes: tuple[str, ...]
+
+
+def plan_checks() -> list[PlanCheck]:
+    from app.crud.SMSCodeRecordCRUD import SMSCodeRecordCRUD
+    from app.crud.TodoCRUD import TodoCRUD
+    from app.crud.UserCRUD import UserCRUD
+
+    def todos(ctx):
+        return TodoCRUD(ctx["session"])
+
+    return [
+        PlanCheck("todo.get_all", lambda ctx: todos(ctx).get_all_todos(ctx["user_id"]),
+                  ("ix_todo_user_id_created_at_id", "ix_todo_user_id_completed")),
+        PlanCheck("todo.list", lambda ctx: todos(ctx).list_todos(ctx["user_id"]),
+                  ("ix_todo_user_id_created_at_id",)),
+        PlanCheck("todo.list_completed", lambda ctx: todos(ctx).list_todos(ctx["user_id"], completed=True),
+                  ("ix_todo_user_id_created_at_id", "ix_todo_user_id_completed")),
+        PlanCheck("todo.completed", lambda ctx: todos(ctx).get_completed_todos(ctx["user_id"]),
+                  ("ix_todo_user_id_completed",)),
+        PlanCheck("todo.not_completed", lambda ctx: todos(ctx).get_not_completed_todos(ctx["user_id"]),
+                  ("ix_todo_user_id_completed",)),
+        PlanCheck("todo.changes", lambda ctx: todos(ctx).get_changes(ctx["user_id"], ctx["now"]),
+                  ("ix_todo_user_id_updated_at_id",)),
+        PlanCheck("todo.changes_since", lambda ctx: todos(ctx).get_changes(
+                      ctx["user_id"], ctx["now"], after=ctx["changes_since"]),
+                  ("ix_todo_user_id_updated_at_id",)),
+        PlanCheck("todo.get", lambda ctx: todos(ctx).get_todo(ctx["todo_id"], ctx["user_id"]),
+                  ("todo_pkey", "sqlite_autoindex_todo_1")),
+        PlanCheck("user.by_phone", lambda ctx: UserCRUD(ctx["session"]).get_user_by_phone(ctx["phone"]),
+                  ("ix_user_phone_number",)),
+        PlanCheck("sms.latest", lambda ctx: SMSCodeRecordCRUD(ctx["session"]).get_latest_sms_code_record(ctx["phone"]),
+                  ("ix_smscoderecord_phone_number_created_at",)),
+    ]
+
+
+def capture_statements(engine, call: Callable[[], object]) -> list[tuple[str, object]]:
+    """执行call并返回期间发出的SELECT语句和参数"""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def explain(engine, statement: str, parameters) -> str:
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).all()
+            return "\n".join(row[0] for row in rows)
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        return "\n".join(row[-1] for row in rows)
+
+
+def sample_context(session) -> dict:
+    """取TODO最多的用户、其中一条TODO、一个有验证码记录的手机号和增量同步游标"""
+    from app.models.table import TODO, SMSCodeRecord, User
+
+    user_id = session.exec(
+        text("SELECT user_id FROM todo GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1")
+        .columns(TODO.user_id)).first()[0]
+    todo_id = session.exec(
+        text("SELECT id FROM todo WHERE user_id = :user_id LIMIT 1")
+        .bindparams(user_id=user_id).columns(TODO.id)).first()[0]
+    phone = session.exec(
+        text("SELECT phone_number FROM smscoderecord LIMIT 1")
+        .columns(SMSCodeRecord.phone_number)).first()
+    if phone is None:
+        phone = session.exec(text("SELECT phone_number FROM \"user\" LIMIT 1")
+                             .columns(User.phone_number)).first()
+    todo_count = session.exec(
+        text("SELECT COUNT(*) FROM todo WHERE user_id = :user_id")
+        .bindparams(user_id=user_id).columns(func.count())).first()[0]
+    now = datetime.now(timezone.utc)
+    return {
+        "user_id": user_id,
+        "todo_id": todo_id,
+        "phone": phone[0],
+        "todo_count": todo_count,
+        "now": now,
+        # 增量同步游标: 造数记录分布在最近一年内,取一周前
+        "changes_since": (now - timedelta(days=7), UUID(int=0)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CRUD查询计划检查")
+    parser.add_argument("--database-url", help="一次性数据库连接串,默认使用临时SQLite文件")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--todos", type=int, default=200_000)
+    parser.add_argument("--sms", type=int, default=20_000)
+    parser.add_argument("--skip-seed", action="store_true", help="库中已有造数数据时跳过建表造数")
+    parser.add_argument("--verbose", action="store_true", help="打印完整的查询计划")
+    parser.add_argument("--drop", action="store_true", help="结束后删除 --database-url 库中按模型创建的表,只用于一次性数据库")
+    args = parser.parse_args()
+
+    tmpdir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{tmpdir.name}/plans.db"
+    # 导入app.models前设置,保证造数和查询使用同一个库
+    os.environ["DATABASE_URL"] = database_url
+
+    from sqlmodel import Session, SQLModel
+
+    from app.core.db import engine
+    from app.seed_data import seed
+
+    failures = 0
+    try:
+        if not args.skip_seed:
+            SQLModel.metadata.create_all(engine)
+            seed(args.users, args.todos, args.sms, engine=engine)
+            if engine.dialect.name == "sqlite":
+                with engine.begin() as conn:
+                    conn.execute(text("ANALYZE"))
+
+        with Session(engine) as session:
+            ctx = sample_context(session)
+            ctx["session"] = session
+            print(f"{engine.dialect.name}, 用户 {ctx['user_id']} 共 {ctx['todo_count']} 条TODO")
+            for check in plan_checks():
+                statements = capture_statements(engine, lambda: check.call(ctx))
+                plans = [explain(engine, statement, parameters) for statement, parameters in statements]
+                ok = bool(plans) and all(any(name in plan for name in check.indexes) for plan in plans)
+                failures += not ok
+                print(f"{'✅' if ok else '❌'} {check.label:<22} 预期 {' / '.join(check.indexes)}")
+                if args.verbose or not ok:
+                    for plan in plans:
+                        print("    " + plan.replace("\n", "\n    "))
+    finally:
+        if tmpdir is not None:
+            engine.dispose()
+            tmpdir.cleanup()
+        elif args.drop:
+            SQLModel.metadata.drop_all(engine)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
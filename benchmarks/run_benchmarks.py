@@ -0,0 +1,352 @@
+"""
+接口压测
+
+用一次性数据库启动 app.main:app(uvicorn子进程),灌入数据后按固定并发压测
+登录、TODO增删改查和起卦接口,输出每个接口的p50/p95/p99延迟和吞吐量,并保存为JSON,
+便于对比不同提交之间的性能变化.
+
+数据库:
+- 默认使用临时SQLite文件作为本地替身,压测结束后删除
+- 传入 --database-url 指向一次性PostgreSQL库时,压测前建表并造数;表默认保留,
+  加 --drop 才在结束后删表,避免误指向正式库时清空数据
+
+数据量:
+- --scale small: 1千用户、10万TODO、1万验证码记录,适合SQLite
+- --scale full: 10万用户、1000万TODO、100万验证码记录,需要PostgreSQL
+
+用法:
+    python -m benchmarks.run_benchmarks --scale small --concurrency 32 --duration 10
+    python -m benchmarks.run_benchmarks --database-url postgresql+psycopg://... --scale full
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from uuid import uuid4
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+SCALES = {
+    "small": {"users": 1_000, "todos": 100_000, "sms": 10_000},
+    "full": {"users": 100_000, "todos": 10_000_000, "sms": 1_000_000},
+}
+
+# 压测时放开验证码限流,固定验证码为1205(非production环境);
+# 关闭所有会改动数据的后台任务(过期验证码清理、软删除归档),保证各次压测的数据集一致,
+# 也不与被测接口争抢SQLite的写锁
+APP_ENV = {
+    "ENVIRONMENT": "local",
+    "SMS_PHONE_RATE_CAPACITY": "1000000",
+    "SMS_IP_RATE_CAPACITY": "1000000000",
+    "SMS_SWEEP_ENABLED": "false",
+    "ARCHIVE_ENABLED": "false",
+    "QUERY_BUDGET_MODE": "off",
+}
+SMS_CODE = 1205
+
+
+def seed_database(users: int, todos: int, sms: int) -> None:
+    """按模型建表并用 app.seed_data 造数,DATABASE_URL需在调用前设置"""
+    from sqlmodel import SQLModel
+
+    from app.core.db import engine
+    from app.seed_data import seed
+
+    SQLModel.metadata.create_all(engine)
+    seed(users, todos, sms)
+
+
+def drop_database() -> None:
+    from sqlmodel import SQLModel
+
+    from app.core.db import engine
+
+    SQLModel.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(database_url: str, workers: int) -> tuple[subprocess.Popen, str]:
+    """启动uvicorn子进程并等待就绪,返回进程和base_url"""
+    port = _free_port()
+    env = {**os.environ, **APP_ENV, "DATABASE_URL": database_url, "WORKERS": str(workers)}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("uvicorn启动失败")
+        try:
+            if httpx.get(f"{base_url}/api/v1/user/ping").status_code == 200:
+                return proc, base_url
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("等待uvicorn就绪超时")
+
+
+class Recorder:
+    """按接口记录每次请求的耗时和状态"""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def call(self, label: str, request: Awaitable[httpx.Response]) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.errors[label] += 1
+            return None
+        self.latencies[label].append(time.perf_counter() - started)
+        try:
+            body = response.json()
+        except ValueError:
+            # 500页面、代理错误页等非JSON响应计为错误,不中断压测;返回None,后续步骤按失败跳过
+            self.errors[label] += 1
+            return None
+        # 业务错误以HTTP 200 + code 500返回
+        if response.status_code >= 400 or isinstance(body, dict) and body.get("code", 200) >= 400:
+            self.errors[label] += 1
+        return response
+
+
+class Context:
+    """场景共享的状态:已登录用户的token和下一个登录手机号"""
+
+    def __init__(self, users: int):
+        from app.seed_data import seed_phone
+
+        self.users = users
+        self.phones = (seed_phone(i) for i in itertools.cycle(range(users)))
+        self.tokens: list[str] = []
+        self.counter = itertools.count()
+
+
+API = "/api/v1"
+
+
+async def login_flow(client: httpx.AsyncClient, ctx: Context, rec: Recorder) -> None:
+    phone = next(ctx.phones)
+    await rec.call("POST /login/request_sms_code", client.post(
+        f"{API}/login/request_sms_code", json={"phone_number": phone}))
+    response = await rec.call("POST /login/signup_and_login", client.post(
+        f"{API}/login/signup_and_login_with_mobile_phone_and_sms_code",
+        json={"phone_number": phone, "sms_code": SMS_CODE}))
+    if response is not None and response.status_code == 200:
+        ctx.tokens.append(response.json()["data"]["access_token"])
+
+
+async def todo_flow(client: httpx.AsyncClient, ctx: Context, rec: Recorder) -> None:
+    n = next(ctx.counter)
+    headers = {"Authorization": f"Bearer {ctx.tokens[n % len(ctx.tokens)]}"}
+    await rec.call("POST /todo/add", client.post(
+        f"{API}/todo/add", json={"text": f"load-{uuid4().hex}"}, headers=headers))
+    response = await rec.call("GET /todo/list", client.get(
+        f"{API}/todo/list", params={"limit": 20}, headers=headers))
+    items = response.json()["items"] if response is not None and response.status_code == 200 else []
+    if not items:
+        return
+    todo_id = items[0]["id"]
+    await rec.call("PUT /todo/complete", client.put(
+        f"{API}/todo/complete", json={"todo_id": todo_id, "completed": True}, headers=headers))
+    await rec.call("PUT /todo/update", client.put(
+        f"{API}/todo/update", json={"todo_id": todo_id, "text": f"load-{uuid4().hex}"},
+        headers=headers))
+    await rec.call("DELETE /todo/", client.request(
+        "DELETE", f"{API}/todo/", json={"todo_id": todo_id}, headers=headers))
+
+
+async def gua_flow(client: httpx.AsyncClient, ctx: Context, rec: Recorder) -> None:
+    await rec.call("GET /gua/", client.get(f"{API}/gua/"))
+    await rec.call("GET /gua/batch", client.get(f"{API}/gua/batch", params={"count": 100}))
+
+
+SCENARIOS: dict[str, Callable[[httpx.AsyncClient, Context, Recorder], Awaitable[None]]] = {
+    "login": login_flow,
+    "todo": todo_flow,
+    "gua": gua_flow,
+}
+
+
+async def prepare_tokens(base_url: str, ctx: Context, count: int) -> None:
+    """不压测登录时,先登录count个用户供TODO场景使用,不计入结果"""
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        for _ in range(count):
+            await login_flow(client, ctx, Recorder())
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(base_url: str, name: str, ctx: Context,
+                       concurrency: int, duration: float) -> dict:
+    """
+    以固定并发循环执行场景,直到达到持续时间
+
+    Returns:
+        dict: 接口 -> 请求数、错误数、p50/p95/p99(ms)和吞吐量(req/s)
+    """
+    flow = SCENARIOS[name]
+    rec = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.monotonic() + duration
+
+        async def worker():
+            while time.monotonic() < deadline:
+                await flow(client, ctx, rec)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    results = {}
+    for label, values in rec.latencies.items():
+        values.sort()
+        results[label] = {
+            "requests": len(values),
+            "errors": rec.errors[label],
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "throughput_rps": len(values) / elapsed,
+        }
+    return results
+
+
+def print_results(results: dict) -> None:
+    print(f"{'endpoint':<34}{'reqs':>8}{'errs':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'rps':>9}")
+    for scenario in results.values():
+        for label, r in scenario.items():
+            print(f"{label:<34}{r['requests']:>8}{r['errors']:>6}{r['p50_ms']:>9.1f}"
+                  f"{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['throughput_rps']:>9.1f}")
+
+
+def compare(old_path: str, new_path: str) -> None:
+    """对比两次压测结果的p95和吞吐量"""
+    old = json.loads(Path(old_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    print(f"{'endpoint':<34}{'p95 ms':>20}{'rps':>20}")
+    for scenario, endpoints in new["results"].items():
+        for label, r in endpoints.items():
+            before = old["results"].get(scenario, {}).get(label)
+            if before is None:
+                continue
+            print(f"{label:<34}{before['p95_ms']:>9.1f} -> {r['p95_ms']:<8.1f}"
+                  f"{before['throughput_rps']:>9.1f} -> {r['throughput_rps']:<8.1f}")
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="接口压测")
+    parser.add_argument("--database-url", help="一次性数据库的同步连接串,默认使用临时SQLite文件")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--scenarios", default="login,todo,gua")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10, help="每个场景的持续秒数")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", help="结果JSON路径,默认 benchmarks/results/<commit>-<时间>.json")
+    parser.add_argument("--drop", action="store_true",
+                        help="结束后删除 --database-url 库中按模型创建的表,只用于一次性数据库")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="对比两次结果后退出")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    sys.path.insert(0, str(ROOT))
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    tmpdir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{tmpdir.name}/bench.db"
+    # 导入app.models前设置,保证建表和子进程使用同一个库
+    os.environ["DATABASE_URL"] = database_url
+
+    scale = SCALES[args.scale]
+    print(f"🌱 灌入数据 ({args.scale}): {scale}")
+    seed_database(**scale)
+
+    proc, base_url = start_server(database_url, args.workers)
+    scenarios = args.scenarios.split(",")
+    results = {}
+    try:
+        ctx = Context(scale["users"])
+        if "todo" in scenarios and "login" not in scenarios:
+            asyncio.run(prepare_tokens(base_url, ctx, args.concurrency))
+        # 登录场景先跑,产生的token供TODO场景使用
+        for name in sorted(scenarios, key=lambda s: s != "login"):
+            print(f"🚀 场景 {name}: 并发 {args.concurrency}, {args.duration}s")
+            results[name] = asyncio.run(
+                run_scenario(base_url, name, ctx, args.concurrency, args.duration))
+    finally:
+        proc.terminate()
+        proc.wait()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+        elif args.drop:
+            drop_database()
+
+    print_results(results)
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "database": database_url.split("://")[0],
+        "scale": scale,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "workers": args.workers,
+        "results": results,
+    }
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{commit or 'unknown'}-{datetime.now():%Y%m%d%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"📄 结果已保存: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+TODO列表序列化耗时对比
+
+对比1000条TODO在不同响应路径下的序列化耗时:
+- fastapi_default: 路由返回模型列表,FastAPI走jsonable_encoder + JSONResponse
+- respmod: 包装为RespMod(data=[todo.model_dump()]),再走默认序列化
+- orjson_response: 返回json_response(todos),orjson default钩子直接取字段
+- orjson_envelope: 返回envelope(data=todos)
+
+用法:
+    python -m benchmarks.serialize_todos [--items 1000] [--rounds 200]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from app.api.responses import envelope, json_response
+from app.models.public_models.Out import RespMod
+from app.models.table import TODO
+
+
+def make_todos(count: int) -> list[TODO]:
+    user_id = uuid4()
+    now = datetime.now(timezone.utc)
+    return [
+        TODO(id=uuid4(), created_at=now, updated_at=now,
+             text=f"todo-{i}", completed=i % 2 == 0, user_id=user_id)
+        for i in range(count)
+    ]
+
+
+async def fastapi_default(todos):
+    content = await serialize_response(response_content=todos, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def respmod(todos):
+    resp = RespMod(data=[todo.model_dump() for todo in todos])
+    content = await serialize_response(response_content=resp, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def orjson_response(todos):
+    return json_response(todos).body
+
+
+async def orjson_envelope(todos):
+    return envelope(data=todos).body
+
+
+CASES = {
+    "fastapi_default": fastapi_default,
+    "respmod": respmod,
+    "orjson_response": orjson_response,
+    "orjson_envelope": orjson_envelope,
+}
+
+
+async def run(items: int, rounds: int) -> None:
+    todos = make_todos(items)
+    print(f"{items} TODO, {rounds} 轮")
+    print(f"{'case':<18}{'median ms':>12}{'p95 ms':>12}{'bytes':>10}")
+    for name, case in CASES.items():
+        body = await case(todos)
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            await case(todos)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{name:<18}{statistics.median(timings):>12.3f}{p95:>12.3f}{len(body):>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TODO列表序列化耗时对比")
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.items, args.rounds))
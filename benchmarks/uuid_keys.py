@@ -0,0 +1,129 @@
+"""
+UUIDv4与UUIDv7主键写入对比
+
+分别向以uuid4和uuid7为主键的两张临时表按批写入相同行数,
+对比写入吞吐、主键索引大小,PostgreSQL装有pgstattuple扩展时另外报告叶子页填充率.
+
+用法:
+    python -m benchmarks.uuid_keys --database-url postgresql+psycopg://... --rows 10000000
+    python -m benchmarks.uuid_keys --rows 1000000  # 临时SQLite文件,结果只作参考
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from app.tool.uuid7 import uuid7
+
+GENERATORS: dict[str, Callable[[], UUID]] = {"v4": uuid4, "v7": uuid7}
+PAYLOAD = "x" * 64
+
+
+def create_table(engine: Engine, table: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        if engine.dialect.name == "postgresql":
+            conn.execute(text(
+                f"CREATE TABLE {table} (id uuid PRIMARY KEY, "
+                f"created_at timestamptz NOT NULL, payload text NOT NULL)"))
+        else:
+            # WITHOUT ROWID使主键成为聚簇B树,与PostgreSQL主键索引的写入模式接近
+            conn.execute(text(
+                f"CREATE TABLE {table} (id BLOB PRIMARY KEY, "
+                f"created_at TEXT NOT NULL, payload TEXT NOT NULL) WITHOUT ROWID"))
+
+
+def insert_batches(engine: Engine, table: str, new_id: Callable[[], UUID],
+                   rows: int, batch_size: int) -> float:
+    """每批一个事务写入,返回耗时秒数"""
+    raw = engine.raw_connection()
+    is_postgres = engine.dialect.name == "postgresql"
+    started = time.perf_counter()
+    try:
+        for start in range(0, rows, batch_size):
+            count = min(batch_size, rows - start)
+            now = datetime.now(timezone.utc)
+            if is_postgres:
+                with raw.driver_connection.cursor() as cur:
+                    with cur.copy(f"COPY {table} (id, created_at, payload) FROM STDIN") as copy:
+                        for _ in range(count):
+                            copy.write_row((new_id(), now, PAYLOAD))
+            else:
+                raw.cursor().executemany(
+                    f"INSERT INTO {table} (id, created_at, payload) VALUES (?, ?, ?)",
+                    [(new_id().bytes, now.isoformat(), PAYLOAD) for _ in range(count)])
+            raw.commit()
+    finally:
+        raw.close()
+    return time.perf_counter() - started
+
+
+def index_stats(engine: Engine, table: str) -> dict:
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            stats = {
+                "index_bytes": conn.execute(
+                    text(f"SELECT pg_relation_size('{table}_pkey')")).scalar(),
+                "table_bytes": conn.execute(
+                    text(f"SELECT pg_table_size('{table}')")).scalar(),
+            }
+            try:
+                stats["avg_leaf_density"] = conn.execute(
+                    text(f"SELECT avg_leaf_density FROM pgstatindex('{table}_pkey')")).scalar()
+            except Exception:
+                conn.rollback()
+            return stats
+        try:
+            size = conn.execute(
+                text("SELECT SUM(pgsize) FROM dbstat WHERE name = :name"), {"name": table}).scalar()
+        except Exception:
+            size = None
+        return {"index_bytes": size}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="UUIDv4与UUIDv7主键写入对比")
+    parser.add_argument("--database-url", help="一次性数据库连接串,默认使用临时SQLite文件")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--keep", action="store_true", help="结束后保留测试表")
+    args = parser.parse_args()
+
+    tmpdir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(tmpdir.name, 'uuid.db')}"
+    engine = create_engine(database_url)
+
+    print(f"{args.rows} 行, 每批 {args.batch_size} 行, {engine.dialect.name}")
+    print(f"{'key':<6}{'rows/s':>12}{'seconds':>10}{'index MB':>11}{'leaf density':>14}")
+    try:
+        for name, new_id in GENERATORS.items():
+            table = f"bench_uuid_{name}"
+            create_table(engine, table)
+            elapsed = insert_batches(engine, table, new_id, args.rows, args.batch_size)
+            stats = index_stats(engine, table)
+            index_mb = stats["index_bytes"] / 1024 / 1024 if stats.get("index_bytes") else float("nan")
+            density = stats.get("avg_leaf_density")
+            print(f"{name:<6}{args.rows / elapsed:>12.0f}{elapsed:>10.1f}{index_mb:>11.1f}"
+                  f"{density if density is not None else '-':>14}")
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                for name in GENERATORS:
+                    conn.execute(text(f"DROP TABLE IF EXISTS bench_uuid_{name}"))
+        engine.dispose()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
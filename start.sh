@@ -18,10 +18,17 @@ set -e
 
 # # 启动应用
  if [ "$ENVIRONMENT" = "production" ] || [ "$ENVIRONMENT" = "staging" ]; then
+     # 把实际worker数传给应用，用于计算每个worker的数据库连接池大小
+     export WORKERS
+     # 多worker共享的Prometheus指标目录，每次启动前清空上次运行留下的数据
+     export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}
+     rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+     mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
      python /WORKDIR/app/log_info.py "在生产或暂存环境中启动应用，使用 $WORKERS 个workers"
      exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers $WORKERS
  else
  # 本地开发模式
+     export WORKERS=1
      python /WORKDIR/app/log_info.py "在开发环境中启动应用，启用热重载模式"
      exec uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
  fi
\ No newline at end of file